@@ -0,0 +1,208 @@
+"""
+This module lets a snake play itself, for attract-mode screens and soak tests.
+
+Each time its snake is about to move, the autopilot searches toward the food with A* over the board's
+occupancy grid and only takes the first step if the snake still has room afterwards (it can reach its
+tail, or at least as many cells as it is long). With no safe path it heads for the most open space.
+Ghost mode and shields are taken into account for as many moves as they have left.
+
+Search buffers are allocated once per board and reset by bumping a generation stamp, paths are reused
+until something blocks them, and each decision expands at most `budget` cells; when the budget runs
+out it follows the most promising partial path, so long snakes and huge boards stay cheap.
+"""
+
+import heapq
+from array import array
+from settings import *
+
+STEPS = (("UP", 0, -1), ("DOWN", 0, 1), ("LEFT", -1, 0), ("RIGHT", 1, 0))
+OPPOSITE = {"UP": "DOWN", "DOWN": "UP", "LEFT": "RIGHT", "RIGHT": "LEFT"}
+
+
+class Autopilot:
+    """
+    Steers one player's snake. Call action() before every engine step; it returns a
+    (player, direction) action when the snake should turn, or None.
+    """
+    def __init__(self, engine, player_num, budget=AUTOPILOT_BUDGET):
+        self.engine = engine
+        self.player_num = player_num
+        self.budget = budget
+        self.board = None
+        self.prepare()
+        self.path = []        # cells still to visit, next one last
+        self.target = -1      # cell the path leads to
+        self.generation = 0
+
+    @property
+    def snake(self):
+        return self.engine.snakes[self.player_num - 1]
+
+    def prepare(self):
+        """
+        (Re)allocate the search buffers when the engine has a new board.
+        """
+        board = self.engine.board
+        if board is not self.board:
+            if self.board is None or board.size != self.board.size:
+                self.stamp = array('I', bytes(4 * board.size))
+                self.parent = array('i', bytes(4 * board.size))
+                self.generation = 0
+            self.board = board
+            self.path = []
+
+    def next_generation(self):
+        self.generation += 1
+        return self.generation
+
+    def moves_left(self, until):
+        """
+        Number of moves the snake makes before the given engine tick.
+        """
+        return max(0, (until - self.engine.tick) // self.engine.move_interval(self.snake))
+
+    def neighbours(self, cell, wrap):
+        board = self.board
+        columns, rows = board.columns, board.rows
+        x, y = cell % columns, cell // columns
+        for direction, dx, dy in STEPS:
+            nx, ny = x + dx, y + dy
+            if wrap:
+                nx, ny = nx % columns, ny % rows
+            elif not (0 <= nx < columns and 0 <= ny < rows):
+                continue
+            yield direction, ny * columns + nx
+
+    def passable(self, cell, step):
+        """
+        Whether the snake can be on a cell `step` moves from now.
+        """
+        board = self.board
+        if board.snake_cells[cell]:
+            # Our own tail moves out of the way, unless we are about to grow
+            snake = self.snake
+            return cell == self.tail and not snake.grow_pending and board.snake_cells[cell] == 1
+        if board.obstacle_cells[cell] and step > self.protected_moves:
+            return False
+        if step == 1 and cell in self.danger:
+            return False
+        return True
+
+    def action(self):
+        engine = self.engine
+        snake = self.snake
+        if engine.game_over or not snake.alive or not engine.moves_next_tick(snake):
+            return None
+        self.prepare()
+
+        board = self.board
+        self.tail = board.cell(snake.body[-1])
+        self.ghost_moves = self.moves_left(snake.ghost_mode_until) if snake.ghost_mode else 0
+        protected_until = max(snake.ghost_mode_until if snake.ghost_mode else 0,
+                              snake.shield_mode_until if snake.shield_mode else 0)
+        self.protected_moves = self.moves_left(protected_until)
+        # Cells another snake's head could also move into next
+        self.danger = set()
+        for other in engine.snakes:
+            if other is not snake and other.alive:
+                self.danger.update(cell for _, cell in self.neighbours(other.head_cell, other.ghost_mode))
+
+        direction = self.choose(snake)
+        if direction is None or direction == snake.direction:
+            return None
+        return (self.player_num, direction)
+
+    def choose(self, snake):
+        head = snake.head_cell
+        food = self.board.cell(self.engine.food.position) if self.engine.food.position is not None else -1
+        # The engine never lets a snake reverse, even when it is a single cell long
+        moves = {cell: direction for direction, cell in self.neighbours(head, self.ghost_moves > 0)
+                 if direction != OPPOSITE[snake.direction]}
+
+        # Keep following the previous path while it leads to the same place and stays open
+        if not (self.path and self.target == food and self.path[-1] in moves and self.passable(self.path[-1], 1)):
+            self.path = self.search(head, food) if food >= 0 else []
+            self.target = food
+        if self.path and self.path[-1] in moves and self.is_safe(self.path[-1], len(snake.body)):
+            return moves[self.path.pop()]
+
+        # No safe way to the food; head for the most open space, preferring to go straight
+        self.path = []
+        best, best_area = None, -1
+        for cell, direction in moves.items():
+            if self.passable(cell, 1):
+                area = self.open_area(cell, len(snake.body) + 1)
+                if area > best_area or (area == best_area and direction == snake.direction):
+                    best, best_area = direction, area
+        return best
+
+    def distance(self, cell, goal):
+        columns, rows = self.board.columns, self.board.rows
+        dx = abs(cell % columns - goal % columns)
+        dy = abs(cell // columns - goal // columns)
+        if self.ghost_moves:
+            dx, dy = min(dx, columns - dx), min(dy, rows - dy)
+        return dx + dy
+
+    def search(self, start, goal):
+        """
+        A* from start toward goal. Returns the path as a list of cells with the first step last,
+        leading to the goal or, if the budget ran out, to the expanded cell closest to it.
+        """
+        stamp, parent, free_slot, danger = self.stamp, self.parent, self.board.free_slot, self.danger
+        generation = self.next_generation()
+        stamp[start] = generation
+        best, best_distance = start, self.distance(start, goal)
+        # Ties on f go to the deeper cell, so open ground is crossed in a straight line
+        heap = [(best_distance, 0, start)]
+        expanded = 0
+        while heap and expanded < self.budget:
+            _, steps, cell = heapq.heappop(heap)
+            steps = -steps
+            if cell == goal:
+                best = cell
+                break
+            expanded += 1
+            steps += 1
+            for _, neighbour in self.neighbours(cell, steps <= self.ghost_moves):
+                # Empty cells are the common case; only look closer at anything else
+                if stamp[neighbour] != generation and (
+                        free_slot[neighbour] >= 0 and (steps > 1 or neighbour not in danger) or
+                        self.passable(neighbour, steps)):
+                    stamp[neighbour] = generation
+                    parent[neighbour] = cell
+                    distance = self.distance(neighbour, goal)
+                    if distance < best_distance:
+                        best, best_distance = neighbour, distance
+                    heapq.heappush(heap, (steps + distance, -steps, neighbour))
+
+        path = []
+        cell = best
+        while cell != start:
+            path.append(cell)
+            cell = parent[cell]
+        return path
+
+    def open_area(self, start, limit):
+        """
+        Count the cells reachable from start, stopping at limit. Reaching our own tail counts as
+        unlimited room, since following it is always safe.
+        """
+        stamp = self.stamp
+        generation = self.next_generation()
+        stamp[start] = generation
+        queue = [start]
+        limit = min(limit, self.budget)
+        for cell in queue:
+            if len(queue) >= limit:
+                break
+            for _, neighbour in self.neighbours(cell, self.ghost_moves > 1):
+                if neighbour == self.tail:
+                    return limit
+                if stamp[neighbour] != generation and self.passable(neighbour, 2):
+                    stamp[neighbour] = generation
+                    queue.append(neighbour)
+        return min(len(queue), limit)
+
+    def is_safe(self, cell, length):
+        return self.open_area(cell, length + 1) >= min(length + 1, self.budget)
@@ -0,0 +1,226 @@
+"""
+This module steps many independent single-player snake games in lockstep.
+All game state lives in NumPy arrays indexed by game, so one call to step() advances every game
+without a Python loop over Snake, Food or PowerUp objects.
+"""
+
+import numpy as np
+from settings import *
+
+# Action indices accepted by BatchEnv.step; -1 keeps the current direction
+UP, DOWN, LEFT, RIGHT = range(4)
+DIRECTIONS = ("UP", "DOWN", "LEFT", "RIGHT")
+OPPOSITE = np.array([DOWN, UP, RIGHT, LEFT], dtype=np.int8)
+DELTA_COL = np.array([0, 0, -1, 1], dtype=np.int32)
+DELTA_ROW = np.array([-1, 1, 0, 0], dtype=np.int32)
+
+# Power-up types and timer columns
+SPEED, GHOST, SHIELD, SHRINK = range(4)
+POWER_UP_TYPES = ("speed", "ghost", "shield", "shrink")
+POWER_UP_TICKS = np.array([
+    SPEED_BOOST_DURATION, GHOST_MODE_DURATION, SHIELD_DURATION, SHRINK_DURATION
+], dtype=np.int32) * GAME_SPEED // 1000
+
+# Codes used by BatchEnv.grids()
+EMPTY, BODY, HEAD, FOOD, POWER_UP, OBSTACLE = range(6)
+
+
+class BatchEnv:
+    """
+    A batch of single-player snake games advanced together.
+
+    Each step moves every snake one cell, which matches one Engine tick at GAME_SPEED.
+    Speed boost is only tracked as a timer, since every step is exactly one move.
+    Finished games are reset automatically at the end of step().
+    """
+    def __init__(self, num_envs, columns=WINDOW_WIDTH // GRID_SIZE, rows=WINDOW_HEIGHT // GRID_SIZE,
+                 obstacle_count=OBSTACLE_COUNT, seed=None):
+        self.num_envs = num_envs
+        self.columns = columns
+        self.rows = rows
+        self.size = columns * rows
+        self.obstacle_count = obstacle_count
+        self.rng = np.random.default_rng(seed)
+        self.spawn_chance = POWER_UP_SPAWN_CHANCE
+
+        n = num_envs
+        self.bodies = np.zeros((n, self.size), dtype=np.int32)  # ring buffer of cells, head at head_index
+        self.head_index = np.zeros(n, dtype=np.int32)
+        self.lengths = np.ones(n, dtype=np.int32)
+        self.directions = np.full(n, RIGHT, dtype=np.int8)
+        self.grow_pending = np.zeros(n, dtype=bool)
+        self.occupancy = np.zeros((n, self.size), dtype=np.uint8)
+        self.obstacles = np.zeros((n, self.size), dtype=bool)
+        self.food = np.zeros(n, dtype=np.int32)
+        self.power_up_cell = np.full(n, -1, dtype=np.int32)
+        self.power_up_type = np.zeros(n, dtype=np.int8)
+        self.timers = np.zeros((n, 4), dtype=np.int32)
+        self.scores = np.zeros(n, dtype=np.int32)
+        self.episode_ticks = np.zeros(n, dtype=np.int32)
+        self.final_scores = np.zeros(n, dtype=np.int32)  # score of the last finished episode
+        self.wins = np.zeros(n, dtype=bool)              # last finished episode filled the board
+        self._rows = np.arange(n)
+        self.reset()
+
+    @property
+    def heads(self):
+        return self.bodies[self._rows, self.head_index]
+
+    def reset(self, indices=None):
+        """
+        Reset the given games (all by default) to a fresh start.
+        """
+        if indices is None:
+            indices = self._rows
+        indices = np.asarray(indices)
+        if len(indices) == 0:
+            return
+        k = len(indices)
+        start = (self.rows // 2) * self.columns + self.columns // 4
+
+        self.occupancy[indices] = 0
+        self.obstacles[indices] = False
+        self.head_index[indices] = 0
+        self.lengths[indices] = 1
+        self.bodies[indices, 0] = start
+        self.directions[indices] = RIGHT
+        self.grow_pending[indices] = False
+        self.occupancy[indices, start] = 1
+        self.timers[indices] = 0
+        self.scores[indices] = 0
+        self.episode_ticks[indices] = 0
+        self.power_up_cell[indices] = -1
+
+        # Obstacles go anywhere except the starting row, where the snake has to get going
+        if self.obstacle_count:
+            keys = self.rng.random((k, self.size))
+            keys[:, start - start % self.columns:start - start % self.columns + self.columns] = 2.0
+            cells = np.argpartition(keys, self.obstacle_count, axis=1)[:, :self.obstacle_count]
+            self.obstacles[indices[:, None], cells] = True
+
+        self.food[indices] = self._random_free_cells(indices)
+
+    def _free_mask(self, indices):
+        free = (self.occupancy[indices] == 0) & ~self.obstacles[indices]
+        free[np.arange(len(indices)), self.food[indices]] = False
+        has_power_up = self.power_up_cell[indices] >= 0
+        free[np.nonzero(has_power_up)[0], self.power_up_cell[indices][has_power_up]] = False
+        return free
+
+    def _random_free_cells(self, indices):
+        """
+        Pick a uniformly random free cell for each game, or -1 if its board is full.
+        """
+        free = (self.occupancy[indices] == 0) & ~self.obstacles[indices]
+        has_power_up = self.power_up_cell[indices] >= 0
+        free[np.nonzero(has_power_up)[0], self.power_up_cell[indices][has_power_up]] = False
+        keys = self.rng.random(free.shape)
+        keys[~free] = -1.0
+        cells = keys.argmax(axis=1).astype(np.int32)
+        cells[~free.any(axis=1)] = -1
+        return cells
+
+    def step(self, actions=None):
+        """
+        Advance every game by one move.
+
+        Args:
+            actions (array-like, optional): One direction index per game (UP, DOWN, LEFT, RIGHT),
+                or -1 to keep going straight. Reversals are ignored.
+
+        Returns:
+            tuple: (rewards, dones) arrays. Games that are done have already been reset;
+                their final score is in final_scores.
+        """
+        rows = self._rows
+        if actions is not None:
+            actions = np.asarray(actions, dtype=np.int8)
+            turn = (actions >= 0) & (actions != OPPOSITE[self.directions])
+            self.directions[turn] = actions[turn]
+
+        ghost = self.timers[:, GHOST] > 0
+        shield = self.timers[:, SHIELD] > 0
+        np.maximum(self.timers - 1, 0, out=self.timers)
+        heads = self.bodies[rows, self.head_index]
+        col = heads % self.columns + DELTA_COL[self.directions]
+        row = heads // self.columns + DELTA_ROW[self.directions]
+        col = np.where(ghost, col % self.columns, col)
+        row = np.where(ghost, row % self.rows, row)
+        off_board = (col < 0) | (col >= self.columns) | (row < 0) | (row >= self.rows)
+        new_heads = np.where(off_board, 0, row * self.columns + col).astype(np.int32)
+
+        # Retire tails before checking the head, so chasing your own tail is allowed
+        moving_tail = ~self.grow_pending
+        tails = self.bodies[rows, (self.head_index - self.lengths + 1) % self.size]
+        self.occupancy[rows[moving_tail], tails[moving_tail]] -= 1
+        self.lengths += self.grow_pending
+        self.grow_pending[:] = False
+
+        self.head_index = (self.head_index + 1) % self.size
+        self.bodies[rows, self.head_index] = new_heads
+
+        dead = off_board | (self.occupancy[rows, new_heads] > 0)
+        dead |= self.obstacles[rows, new_heads] & ~ghost & ~shield
+        self.occupancy[rows[~off_board], new_heads[~off_board]] += 1
+
+        rewards = np.zeros(self.num_envs, dtype=np.int32)
+        won = np.zeros(self.num_envs, dtype=bool)
+
+        # Food
+        ate = ~dead & (new_heads == self.food)
+        if ate.any():
+            eaters = rows[ate]
+            self.grow_pending[eaters] = self.timers[eaters, SHRINK] == 0
+            rewards[eaters] += NORMAL_FOOD_SCORE
+            self.food[eaters] = self._random_free_cells(eaters)
+            won[eaters] = self.food[eaters] < 0
+
+        # Power-ups
+        collected = ~dead & (new_heads == self.power_up_cell)
+        if collected.any():
+            collectors = rows[collected]
+            types = self.power_up_type[collectors]
+            self.timers[collectors, types] = POWER_UP_TICKS[types]
+            rewards[collectors] += SPEED_BOOST_SCORE
+            self.power_up_cell[collectors] = -1
+            for i in collectors[types == SHRINK]:
+                self._shrink(i)
+
+        spawn = (self.power_up_cell < 0) & (self.rng.random(self.num_envs) < self.spawn_chance)
+        if spawn.any():
+            spawners = rows[spawn]
+            free = self._free_mask(spawners)
+            keys = self.rng.random(free.shape)
+            keys[~free] = -1.0
+            cells = keys.argmax(axis=1).astype(np.int32)
+            cells[~free.any(axis=1)] = -1
+            self.power_up_cell[spawners] = cells
+            self.power_up_type[spawners] = self.rng.integers(0, 4, len(spawners))
+
+        self.scores += rewards
+        self.episode_ticks += 1
+        dones = dead | won
+        if dones.any():
+            finished = rows[dones]
+            self.final_scores[finished] = self.scores[finished]
+            self.wins[finished] = won[finished]
+            self.reset(finished)
+        return rewards, dones
+
+    def _shrink(self, i):
+        keep = self.lengths[i] // 2 if self.lengths[i] > 1 else 1
+        for k in range(keep, self.lengths[i]):
+            self.occupancy[i, self.bodies[i, (self.head_index[i] - k) % self.size]] -= 1
+        self.lengths[i] = keep
+
+    def grids(self):
+        """
+        Return an (num_envs, rows, columns) int8 array of cell codes for observation.
+        """
+        grid = np.where(self.occupancy > 0, BODY, EMPTY).astype(np.int8)
+        grid[self.obstacles] = OBSTACLE
+        grid[self._rows, self.food] = FOOD
+        has_power_up = self.power_up_cell >= 0
+        grid[self._rows[has_power_up], self.power_up_cell[has_power_up]] = POWER_UP
+        grid[self._rows, self.heads] = HEAD
+        return grid.reshape(self.num_envs, self.rows, self.columns)
@@ -0,0 +1,361 @@
+"""
+Micro- and macro-benchmarks for the engine and renderer.
+
+Runs headlessly under the SDL dummy video driver, prints one line per case, and compares the
+results against a stored baseline; any case slower than the baseline by more than the threshold
+makes the run exit with status 1. Cases that produce data also report its size, such as the bytes
+of a game snapshot; sizes are printed and saved with the results but are not compared.
+
+Each case is timed as the median of several batches, so one slow batch doesn't decide the result.
+Cases that draw or write files vary more from run to run and carry a looser tolerance of their own.
+The baseline only means something on the machine it was recorded on: refresh it with --save-baseline
+whenever the machine or the Python and pygame versions change, and after an intentional change to
+the speed of some cases (with -k, only the matching cases are replaced).
+
+    python benchmarks/bench.py                     # run everything, compare to baseline.json
+    python benchmarks/bench.py -k snake_move       # only cases whose name contains snake_move
+    python benchmarks/bench.py --json results.json # also write machine-readable results
+    python benchmarks/bench.py --save-baseline     # record the current results as the baseline
+    python benchmarks/bench.py -k state_ --save-baseline  # re-record only the state_* cases
+"""
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+from collections import deque
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import pygame
+from board import Board
+from engine import Engine
+from food import Food
+from obstacle import Obstacle
+from snake import Snake
+from snapshot import Snapshot
+from state import GameState
+from settings import *
+
+BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+SNAKE_LENGTHS = (1, 100, 1000, 10000)
+BOARDS = {"small": (WINDOW_WIDTH // GRID_SIZE, WINDOW_HEIGHT // GRID_SIZE), "large": (120, 120)}
+CASES = []
+NOISY = 1.5  # extra tolerance for cases that draw or touch the disk, times --threshold
+
+
+def case(name, tolerance=1.0):
+    """
+    Register a benchmark. The decorated function does the setup and returns the operation to time,
+    or (operation, size in bytes) for operations that produce data. A case fails when it is slower
+    than its baseline by more than --threshold times its tolerance.
+    """
+    def register(setup):
+        CASES.append((name, setup, tolerance))
+        return setup
+    return register
+
+
+def board_for(length):
+    return Board(*BOARDS["small"]) if length < 1000 else Board(*BOARDS["large"])
+
+
+def hamiltonian_cycle(board):
+    """
+    Return the cells of a cycle through every cell of a board with an even number of rows:
+    along the top row, snaking down through the other columns, and back up the first column.
+    """
+    columns, rows = board.columns, board.rows
+    cells = list(range(columns))
+    for row in range(1, rows):
+        order = range(columns - 1, 0, -1) if row % 2 == 1 else range(1, columns)
+        cells.extend(row * columns + column for column in order)
+    cells.extend(row * columns for row in range(rows - 1, 0, -1))
+    return cells
+
+
+def make_snake(board, length, player_number=1):
+    """
+    Build a snake of the given length lying along a cycle through the whole board.
+    Returns the snake and a map from each cell to the direction that continues the cycle,
+    so the snake can keep moving forever without running into itself.
+    """
+    cycle = hamiltonian_cycle(board)
+    directions = {}
+    for cell, following in zip(cycle, cycle[1:] + cycle[:1]):
+        if following == cell + 1:
+            directions[cell] = "RIGHT"
+        elif following == cell - 1:
+            directions[cell] = "LEFT"
+        else:
+            directions[cell] = "DOWN" if following > cell else "UP"
+
+    snake = Snake(player_number, board=board)
+    board.remove_snake(snake.head_cell)
+    snake.body = deque(board.position(cell) for cell in reversed(cycle[:length]))
+    for segment in snake.body:
+        board.add_snake(board.cell(segment), player_number)
+    snake.head_cell = board.cell(snake.body[0])
+    snake.previous_head = snake.body[0]
+    snake.direction = directions[snake.head_cell]
+    return snake, directions
+
+
+def make_game(mode, board_size=None):
+    from game import Game
+    game = Game(audio=False, headless=True, board_size=board_size)
+    game.game_mode = mode
+    game.reset_game()
+    return game
+
+
+for length in SNAKE_LENGTHS:
+    @case(f"snake_move[len={length}]")
+    def snake_move(length=length):
+        board = board_for(length)
+        snake, directions = make_snake(board, length)
+
+        def op():
+            snake.direction = directions[snake.head_cell]
+            snake.move()
+        return op
+
+    for mode in ("1P", "2P"):
+        @case(f"check_collision[len={length},{mode}]")
+        def check_collision(length=length, mode=mode):
+            columns, rows = BOARDS["small"] if length < 1000 else BOARDS["large"]
+            engine = Engine(mode, seed=1, columns=columns, rows=rows)
+            snake, _ = make_snake(engine.board, length)
+            engine.board.remove_snake(engine.snakes[0].head_cell)
+            engine.snakes[0] = snake
+            events = []
+            return lambda: engine.check_collision(snake, 1, events)
+
+    for ghost in (False, True):
+        @case(f"snake_draw[len={length},{'ghost' if ghost else 'normal'}]", tolerance=NOISY)
+        def snake_draw(length=length, ghost=ghost):
+            board = board_for(length)
+            snake, _ = make_snake(board, length)
+            snake.ghost_mode = ghost
+            screen = pygame.Surface((board.width, board.height))
+            return lambda: snake.draw(screen)
+
+for board_name, (columns, rows) in BOARDS.items():
+    @case(f"generate_obstacles[{board_name},count={OBSTACLE_COUNT}]")
+    def generate_obstacles(columns=columns, rows=rows):
+        return lambda: Obstacle(Board(columns, rows))
+
+    for fill in (0, 50, 99):
+        @case(f"food_randomize[{board_name},fill={fill}%]")
+        def food_randomize(columns=columns, rows=rows, fill=fill):
+            board = Board(columns, rows)
+            for cell in range(board.size * fill // 100):
+                board.add_obstacle(cell)
+            food = Food(board)
+            return food.randomize_position
+
+@case("generate_obstacles[500x500,count=5000]")
+def generate_obstacles_huge():
+    return lambda: Obstacle(Board(500, 500), count=5000)
+
+for mode in ("1P", "2P"):
+    @case(f"draw_score[{mode}]", tolerance=NOISY)
+    def draw_score(mode=mode):
+        game = make_game(mode)
+        return game.draw_score
+
+    @case(f"playing_frame[{mode}]", tolerance=NOISY)
+    def playing_frame(mode=mode):
+        game = make_game(mode)
+
+        def op():
+            if game.engine.game_over:
+                game.reset_game()
+            game.engine.step()
+            game.draw_game()
+            game.draw_score()
+            pygame.display.flip()
+        return op
+
+    @case(f"camera_frame[2000x2000,{mode}]", tolerance=NOISY)
+    def camera_frame(mode=mode):
+        game = make_game(mode, board_size=(2000, 2000))
+
+        def op():
+            # Resetting a board this size would dominate, so keep drawing the last frame instead
+            if not game.engine.game_over:
+                game.engine.step()
+            game.camera.draw(0.5)
+            game.draw_score()
+        return op
+
+
+for mode in ("1P", "2P"):
+    @case(f"state_clone[{mode}]")
+    def state_clone(mode=mode):
+        engine = Engine(mode, seed=1)
+        return GameState.capture(engine).clone
+
+    @case(f"state_load[{mode}]")
+    def state_load(mode=mode):
+        engine = Engine(mode, seed=1)
+        state = GameState.capture(engine)
+        return lambda: state.load(engine)
+
+for players in (8, 64):
+    @case(f"arena_step[200x200,players={players}]")
+    def arena_step(players=players):
+        engine = Engine("ARENA", seed=1, columns=200, rows=200, players=players)
+
+        def op():
+            # Ghost snakes wrap around and pass obstacles, so the arena keeps all its players
+            for snake in engine.snakes:
+                snake.ghost_mode = True
+            engine.step()
+        return op
+
+
+def played(mode, columns=BOARDS["small"][0], rows=BOARDS["small"][1]):
+    engine = Engine(mode, seed=1, columns=columns, rows=rows)
+    for _ in range(600):
+        if engine.game_over:
+            break
+        engine.step()
+    return engine
+
+
+for mode in ("1P", "2P", "ARENA"):
+    # Capturing is what an autosave costs the game thread; saving runs on the writer thread
+    @case(f"snapshot_capture[{mode}]")
+    def snapshot_capture(mode=mode):
+        engine = played(mode)
+        return lambda: Snapshot.capture(engine)
+
+    @case(f"snapshot_save[{mode}]", tolerance=NOISY)
+    def snapshot_save(mode=mode):
+        snapshot = Snapshot.capture(played(mode))
+        path = os.path.join(tempfile.mkdtemp(), "bench.snap")
+        return (lambda: snapshot.save(path)), len(snapshot.encode())
+
+    @case(f"snapshot_restore[{mode}]")
+    def snapshot_restore(mode=mode):
+        data = Snapshot.capture(played(mode)).encode()
+        return lambda: Snapshot.decode(data).restore()
+
+# Boards above AUTOSAVE_MAX_CELLS skip the periodic autosave because of what this costs
+@case("snapshot_capture[2000x2000,1P]")
+def snapshot_capture_huge():
+    engine = played("1P", 2000, 2000)
+    return lambda: Snapshot.capture(engine)
+
+
+def measure(op, min_time=0.2, repeats=9):
+    """
+    Return the median per-call time in nanoseconds over several timed batches.
+    """
+    # Find a batch size that takes about min_time / repeats
+    number = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(number):
+            op()
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time / repeats or number >= 1 << 20:
+            break
+        number *= 2
+    times = [elapsed / number]
+    for _ in range(repeats - 1):
+        start = time.perf_counter()
+        for _ in range(number):
+            op()
+        times.append((time.perf_counter() - start) / number)
+    return statistics.median(times) * 1e9
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the snake engine and renderer")
+    parser.add_argument("-k", dest="patterns", action="append", default=[],
+                        help="only run cases whose name contains this; may be given more than once")
+    parser.add_argument("--json", help="write results to this file")
+    parser.add_argument("--baseline", default=BASELINE, help="baseline file to compare against")
+    parser.add_argument("--save-baseline", action="store_true",
+                        help="store results as the new baseline, keeping the cases that were not run")
+    parser.add_argument("--threshold", type=float, default=2.0,
+                        help="fail when a case is this many times slower than its baseline")
+    parser.add_argument("--min-time", type=float, default=0.2, help="seconds spent timing each case")
+    parser.add_argument("--repeats", type=int, default=9, help="timed batches per case; the median is kept")
+    args = parser.parse_args()
+
+    pygame.display.init()
+    pygame.font.init()
+    pygame.display.set_mode((WINDOW_WIDTH, WINDOW_HEIGHT))
+
+    environment = {
+        "python": platform.python_version(),
+        "pygame": pygame.version.ver,
+        "machine": platform.machine(),
+    }
+    stored = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            stored = json.load(f)
+        different = [f"{key} {stored.get(key)}" for key, value in environment.items() if stored.get(key) != value]
+        if different:
+            print(f"Note: the baseline was recorded with {', '.join(different)}; "
+                  f"refresh it with --save-baseline on this machine\n")
+    baseline = stored.get("results", {})
+
+    results = {}
+    sizes = {}
+    regressions = []
+    for name, setup, tolerance in CASES:
+        if args.patterns and not any(pattern in name for pattern in args.patterns):
+            continue
+        op = setup()
+        size = None
+        if isinstance(op, tuple):
+            op, size = op
+            sizes[name] = size
+        ns = measure(op, args.min_time, args.repeats)
+        results[name] = ns
+        line = f"{name:48s} {ns:14,.0f} ns"
+        if name in baseline:
+            ratio = ns / baseline[name]
+            line += f"   {ratio:5.2f}x baseline"
+            if ratio > args.threshold * tolerance:
+                line += "   REGRESSION"
+                regressions.append((name, ratio, args.threshold * tolerance))
+        if size is not None:
+            line += f"   {size:,} bytes"
+        print(line, flush=True)
+
+    report = dict(environment, results=results, sizes=sizes)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+    if args.save_baseline:
+        # Keep the cases this run skipped, in registration order
+        order = [name for name, _, _ in CASES]
+        for key in ("results", "sizes"):
+            merged = dict(stored.get(key, {}), **report[key])
+            report[key] = {name: merged[name] for name in sorted(merged, key=lambda name: (
+                order.index(name) if name in order else len(order)))}
+        with open(args.baseline, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Saved baseline to {args.baseline}")
+    elif regressions:
+        print(f"\n{len(regressions)} case(s) slower than their baseline allows:")
+        for name, ratio, limit in regressions:
+            print(f"  {name}: {ratio:.2f}x, limit {limit:g}x")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+import random
+from array import array
+from settings import *
+
+
+class Board:
+    """
+    Occupancy grid shared by everything on the playing field.
+    Cells are indexed row-major, so every lookup is a single bytearray access.
+    """
+    def __init__(self, columns=WINDOW_WIDTH // GRID_SIZE, rows=WINDOW_HEIGHT // GRID_SIZE, rng=None):
+        self.rng = rng if rng is not None else random.Random()  # every random choice in a game goes through this
+        self.columns = columns
+        self.rows = rows
+        self.size = columns * rows
+        self.width = columns * GRID_SIZE
+        self.height = rows * GRID_SIZE
+        self.snake_cells = bytearray(self.size)     # number of snake segments per cell
+        self.obstacle_cells = bytearray(self.size)  # 1 where an obstacle sits
+        self.item_cells = bytearray(self.size)      # number of food and power-up items per cell
+        # Free-cell index: free_cells holds every empty cell, free_slot maps a cell to its slot or -1
+        self.free_cells = array('i', range(self.size))
+        self.free_slot = array('i', self.free_cells)
+        self.owner = bytearray(self.size)  # player number of the last snake to enter each cell
+        self.dirty = None                  # set of changed cells, only tracked when a renderer asks for it
+
+    def cell(self, pos):
+        """
+        Convert a pixel position to a cell index, or -1 if it lies off the board.
+        """
+        x, y = pos
+        if 0 <= x < self.width and 0 <= y < self.height:
+            return (y // GRID_SIZE) * self.columns + x // GRID_SIZE
+        return -1
+
+    def position(self, cell):
+        return ((cell % self.columns) * GRID_SIZE, (cell // self.columns) * GRID_SIZE)
+
+    def is_free(self, cell):
+        return self.free_slot[cell] >= 0
+
+    @property
+    def is_full(self):
+        return len(self.free_cells) == 0
+
+    def random_free_cell(self):
+        """
+        Pick a uniformly random empty cell in constant time, or -1 if the board is full.
+        """
+        if not self.free_cells:
+            return -1
+        return self.free_cells[self.rng.randrange(len(self.free_cells))]
+
+    def _cell_changed(self, cell):
+        if self.dirty is not None:
+            self.dirty.add(cell)
+        free = not (self.snake_cells[cell] or self.obstacle_cells[cell] or self.item_cells[cell])
+        slot = self.free_slot[cell]
+        if free and slot < 0:
+            self.free_slot[cell] = len(self.free_cells)
+            self.free_cells.append(cell)
+        elif not free and slot >= 0:
+            # Swap-remove: move the last free cell into this slot
+            last = self.free_cells.pop()
+            if last != cell:
+                self.free_cells[slot] = last
+                self.free_slot[last] = slot
+            self.free_slot[cell] = -1
+
+    def add_snake(self, cell, player_number=1):
+        if cell >= 0:
+            self.snake_cells[cell] += 1
+            self.owner[cell] = player_number
+            self._cell_changed(cell)
+
+    def remove_snake(self, cell):
+        if cell >= 0:
+            self.snake_cells[cell] -= 1
+            self._cell_changed(cell)
+
+    def add_obstacle(self, cell):
+        if cell >= 0:
+            self.obstacle_cells[cell] = 1
+            self._cell_changed(cell)
+
+    def remove_obstacle(self, cell):
+        if cell >= 0:
+            self.obstacle_cells[cell] = 0
+            self._cell_changed(cell)
+
+    def add_item(self, cell):
+        if cell >= 0:
+            self.item_cells[cell] += 1
+            self._cell_changed(cell)
+
+    def remove_item(self, cell):
+        if cell >= 0:
+            self.item_cells[cell] -= 1
+            self._cell_changed(cell)
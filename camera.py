@@ -0,0 +1,136 @@
+import pygame
+from sprites import get_atlas
+from power_up import POWER_UP_COLORS
+from settings import *
+
+
+class Camera:
+    """
+    A viewport onto the board, in board pixels, that follows a point (usually a snake's head).
+    """
+    def __init__(self, viewport, board):
+        self.viewport = pygame.Rect(viewport)  # where on screen this camera draws
+        self.board = board
+        self.x = self.y = 0                    # board pixel at the viewport's top-left corner
+
+    def follow(self, x, y):
+        """
+        Center on (x, y), keeping the view inside the board; a board smaller than the view is centered.
+        """
+        board, view = self.board, self.viewport
+        if board.width <= view.width:
+            self.x = (board.width - view.width) // 2
+        else:
+            self.x = max(0, min(board.width - view.width, int(x) - view.width // 2))
+        if board.height <= view.height:
+            self.y = (board.height - view.height) // 2
+        else:
+            self.y = max(0, min(board.height - view.height, int(y) - view.height // 2))
+
+    def visible_range(self):
+        """
+        Return the first and last visible column and row.
+        """
+        board, view = self.board, self.viewport
+        first_col = max(0, self.x // GRID_SIZE)
+        last_col = min(board.columns - 1, (self.x + view.width - 1) // GRID_SIZE)
+        first_row = max(0, self.y // GRID_SIZE)
+        last_row = min(board.rows - 1, (self.y + view.height - 1) // GRID_SIZE)
+        return first_col, last_col, first_row, last_row
+
+    def to_screen(self, pos):
+        return (pos[0] - self.x + self.viewport.left, pos[1] - self.y + self.viewport.top)
+
+
+class CameraRenderer:
+    """
+    Draws boards larger than the window through cameras that follow the snakes: a split screen in 2P,
+    otherwise one view on our own snake. Only the cells inside each view are looked at, straight from the board's
+    occupancy grids, so the cost of a frame depends on the window size and not the board size.
+    """
+    def __init__(self, game):
+        self.game = game
+        self.board = None
+        self.cameras = []
+
+    def setup(self, board, players):
+        self.board = board
+        width = WINDOW_WIDTH // players
+        self.cameras = [Camera((i * width, 0, width, WINDOW_HEIGHT), board) for i in range(players)]
+
+    def draw(self, alpha=None):
+        game = self.game
+        engine = game.engine
+        screen = game.screen
+        snakes = [snake for snake in engine.snakes if snake.alive]
+        if engine.game_mode == "2P":
+            followed = engine.snakes
+        else:
+            followed = [engine.snakes[game.client.player_num - 1 if game.client is not None else 0]]
+        if engine.board is not self.board or len(self.cameras) != len(followed):
+            self.setup(engine.board, len(followed))
+
+        # Heads slide between cells like in a full redraw
+        heads = []
+        for snake in snakes:
+            progress = 1.0
+            if alpha is not None and INTERPOLATE_MOVEMENT and not engine.game_over:
+                progress = engine.move_progress(snake, alpha)
+            head = snake.body[0]
+            px, py = snake.previous_head
+            if progress < 1.0 and abs(head[0] - px) + abs(head[1] - py) == GRID_SIZE:
+                head = (round(px + (head[0] - px) * progress), round(py + (head[1] - py) * progress))
+            heads.append(head)
+
+        for camera, snake in zip(self.cameras, followed):
+            head = heads[snakes.index(snake)] if snake.alive else snake.body[0]
+            camera.follow(head[0] + GRID_SIZE // 2, head[1] + GRID_SIZE // 2)
+            screen.set_clip(camera.viewport)
+            screen.fill(BLACK, camera.viewport)
+            self.draw_view(screen, camera, snakes, heads)
+        screen.set_clip(None)
+        if len(self.cameras) > 1:
+            for camera in self.cameras[1:]:
+                pygame.draw.line(screen, GRAY, camera.viewport.topleft, camera.viewport.bottomleft)
+
+    def draw_view(self, screen, camera, snakes, heads):
+        engine = self.game.engine
+        board = self.board
+        atlas = get_atlas()
+        columns = board.columns
+        snake_cells, obstacle_cells, item_cells = board.snake_cells, board.obstacle_cells, board.item_cells
+        body_tiles = {snake.player_number: atlas.tile(snake.get_snake_color(False), snake.ghost_mode)
+                      for snake in engine.snakes}
+        head_cells = {snake.head_cell for snake in snakes}
+        food_cell = board.cell(engine.food.position) if engine.food.position is not None else -1
+        power_ups = engine.power_ups.items
+
+        # Same stacking order as a full redraw: heads, bodies, food, power-up, obstacles
+        for snake, head in zip(snakes, heads):
+            tile = atlas.tile(snake.get_snake_color(True), snake.ghost_mode, snake.shield_mode)
+            screen.blit(tile, camera.to_screen(head))
+
+        first_col, last_col, first_row, last_row = camera.visible_range()
+        offset_x = camera.viewport.left - camera.x
+        offset_y = camera.viewport.top - camera.y
+        tiles = []
+        items = []
+        for row in range(first_row, last_row + 1):
+            y = row * GRID_SIZE + offset_y
+            start = row * columns
+            for cell in range(start + first_col, start + last_col + 1):
+                if snake_cells[cell] and cell not in head_cells:
+                    tiles.append((body_tiles[board.owner[cell]], ((cell - start) * GRID_SIZE + offset_x, y)))
+                if item_cells[cell] or obstacle_cells[cell]:
+                    items.append(cell)
+        screen.blits(tiles, doreturn=False)
+
+        for cell in items:
+            x, y = board.position(cell)
+            rect = (x + offset_x, y + offset_y, GRID_SIZE - 1, GRID_SIZE - 1)
+            if cell == food_cell:
+                pygame.draw.rect(screen, RED, rect)
+            if cell in power_ups:
+                pygame.draw.rect(screen, POWER_UP_COLORS[power_ups[cell][0]], rect)
+            if obstacle_cells[cell]:
+                pygame.draw.rect(screen, YELLOW, rect)
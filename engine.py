@@ -0,0 +1,266 @@
+import math
+import random
+from board import Board
+from snake import Snake
+from food import Food
+from power_up import PowerUps, POWER_UP_TYPES
+from obstacle import Obstacle
+from scheduler import Scheduler
+from settings import *
+
+
+OPPOSITE_DIRECTIONS = {"UP": "DOWN", "DOWN": "UP", "LEFT": "RIGHT", "RIGHT": "LEFT"}
+TICK_MS = 1000 / SIM_TICK_RATE
+TICKS_PER_MOVE = SIM_TICK_RATE // GAME_SPEED  # simulation ticks between moves at normal speed
+DEATH_CAUSES = ("wall", "obstacle", "self", "snake", "head_on", "board_full")
+DEFAULT_CELLS = (WINDOW_WIDTH // GRID_SIZE) * (WINDOW_HEIGHT // GRID_SIZE)
+POWER_UP_LIFETIME_TICKS = POWER_UP_LIFETIME * SIM_TICK_RATE // 1000
+
+
+class Engine:
+    """
+    Headless simulation of one game: snakes, food, power-ups, obstacles, collision and scoring.
+    Nothing here touches the display, the mixer or the event queue, so a game can be advanced
+    as fast as step() can be called.
+
+    The simulation runs at a fixed SIM_TICK_RATE. Each snake moves on its own schedule,
+    every TICKS_PER_MOVE ticks, or twice as often while it has a speed boost. Power-ups appearing,
+    disappearing and wearing off are timers on the scheduler, counted in ticks, so they behave the
+    same however fast the simulation is run.
+
+    game_mode is "1P", "2P" or "ARENA"; an arena holds `players` snakes (ARENA_PLAYERS by default)
+    and goes on until at most one is left.
+    """
+    def __init__(self, game_mode="1P", seed=None, columns=WINDOW_WIDTH // GRID_SIZE, rows=WINDOW_HEIGHT // GRID_SIZE,
+                 players=None):
+        self.game_mode = game_mode
+        self.players = players or {"1P": 1, "2P": 2}.get(game_mode, ARENA_PLAYERS)
+        self.columns = columns
+        self.rows = rows
+        self.profiler = None  # optional FrameProfiler timing the phases of step()
+        self.reset(seed)
+
+    def reset(self, seed=None):
+        """
+        Start a new game. Every random choice comes from a generator seeded with seed,
+        so the same seed and inputs always replay the same game. A fresh seed is drawn if None.
+        """
+        self.seed = seed if seed is not None else random.getrandbits(32)
+        self.rng = random.Random(self.seed)
+        self.tick = 0
+        self.time = 0
+        self.game_over = False
+        self.board_full = False
+        self.death_cause = None
+        self.winner = None   # player left standing when the game ended, 0 if nobody
+        self.score = [0] * self.players
+        self.board = Board(self.columns, self.rows, rng=self.rng)
+        self.snakes = [Snake(player_number, board=self.board, start=start)
+                       for player_number, start in enumerate(self.starts(), 1)]
+        # Keep the obstacle density of the default board on larger ones
+        obstacle_count = max(OBSTACLE_COUNT, OBSTACLE_COUNT * self.board.size // DEFAULT_CELLS)
+        self.obstacles = Obstacle(board=self.board, count=obstacle_count)
+        self.food = Food(board=self.board)
+        self.power_ups = PowerUps(board=self.board)
+        self.scheduler = Scheduler()
+        self.schedule_spawn()
+
+    def move_interval(self, snake):
+        return max(1, TICKS_PER_MOVE // 2) if snake.speed_boost else TICKS_PER_MOVE
+
+    def moves_next_tick(self, snake):
+        return min(snake.move_countdown, self.move_interval(snake)) <= 1
+
+    def move_progress(self, snake, alpha=0.0):
+        """
+        How far a snake is between its last move and its next one, from 0 to 1.
+        alpha is the fraction of the current tick that has elapsed, used for interpolation.
+        """
+        interval = self.move_interval(snake)
+        return min(1.0, max(0.0, (interval - snake.move_countdown + alpha) / interval))
+
+    def starts(self):
+        """
+        Starting cell and direction of every snake. One or two snakes start a quarter of the way in
+        from either side; an arena spreads its snakes over a grid, alternating directions by row so
+        that no two of them start out heading for each other.
+        """
+        columns, rows = self.columns, self.rows
+        if self.players <= 2:
+            return [None] * self.players  # the snake's own default start
+        across = math.ceil(math.sqrt(self.players * columns / rows))
+        down = math.ceil(self.players / across)
+        if across > columns // 2 or down > rows // 2:
+            raise ValueError(f"a {columns}x{rows} board is too small for {self.players} snakes")
+        starts = []
+        for i in range(self.players):
+            x, y = i % across, i // across
+            column = (2 * x + 1) * columns // (2 * across)
+            row = (2 * y + 1) * rows // (2 * down)
+            starts.append(((column * GRID_SIZE, row * GRID_SIZE), "RIGHT" if y % 2 == 0 else "LEFT"))
+        return starts
+
+    def set_direction(self, player_num, direction):
+        """
+        Turn a snake, ignoring directions that would reverse it into itself.
+        """
+        if not 1 <= player_num <= len(self.snakes):
+            return
+        snake = self.snakes[player_num - 1]
+        if direction in OPPOSITE_DIRECTIONS and snake.direction != OPPOSITE_DIRECTIONS[direction]:
+            snake.direction = direction
+
+    def step(self, actions=None):
+        """
+        Advance the game by one simulation tick.
+
+        Args:
+            actions (list, optional): (player, direction) pairs applied in order before moving,
+                where direction is "UP", "DOWN", "LEFT" or "RIGHT".
+
+        Returns:
+            list: Events raised during the tick, as tuples:
+                ("food", player), ("power_up", player, type), ("death", player, cause) for every
+                snake that died and ("game_over", player, cause) for the first of them when the game
+                ends, where cause is one of DEATH_CAUSES. When the game ends because the board is
+                full, board_full is set and the cause is "board_full".
+        """
+        events = []
+        if self.game_over:
+            return events
+
+        if actions:
+            for player_num, direction in actions:
+                self.set_direction(player_num, direction)
+
+        self.tick += 1
+        self.time = int(self.tick * TICK_MS)
+
+        profiler = self.profiler
+        moved = []
+        for player_num, snake in enumerate(self.snakes, 1):
+            if not snake.alive:
+                continue
+            snake.move_countdown = min(snake.move_countdown, self.move_interval(snake)) - 1
+            if snake.move_countdown <= 0:
+                snake.move()
+                snake.move_countdown = self.move_interval(snake)
+                moved.append((player_num, snake))
+        if profiler is not None:
+            profiler.lap("move")
+
+        # Nothing to do unless a timer is due
+        heap = self.scheduler.heap
+        if heap and heap[0][0] <= self.tick:
+            self.run_timers()
+        if profiler is not None:
+            profiler.lap("power_ups")
+
+        # Every snake that moved is checked against the board as it is after all the moves,
+        # so simultaneous moves and head-on collisions resolve the same whatever the order
+        deaths = []
+        for player_num, snake in moved:
+            cause = self.check_collision(snake, player_num, events)
+            if cause == "board_full":
+                deaths = [(player_num, snake, cause)]
+                break
+            if cause:
+                deaths.append((player_num, snake, cause))
+        if deaths:
+            self.resolve_deaths(deaths, events)
+        if profiler is not None:
+            profiler.lap("collision")
+        return events
+
+    def run_timers(self):
+        for kind, payload in self.scheduler.pop_due(self.tick):
+            if kind == "expire":
+                player_num, effect, until = payload
+                self.snakes[player_num - 1].expire_power_up(POWER_UP_TYPES[effect], until)
+            elif kind == "despawn":
+                self.power_ups.despawn(*payload)
+            elif kind == "spawn":
+                placed = self.power_ups.spawn()
+                if placed is not None:
+                    self.scheduler.schedule(self.tick + POWER_UP_LIFETIME_TICKS, "despawn", placed)
+                self.schedule_spawn()
+
+    def schedule_spawn(self):
+        """
+        Schedule the next power-up. A spawn roll of POWER_UP_SPAWN_CHANCE every move succeeds after a
+        geometrically distributed number of rolls, so draw that number once instead of rolling every move.
+        """
+        rolls = 1 + int(math.log(1.0 - self.rng.random()) / math.log(1.0 - POWER_UP_SPAWN_CHANCE))
+        self.scheduler.schedule(self.tick + rolls * TICKS_PER_MOVE, "spawn")
+
+    def resolve_deaths(self, deaths, events):
+        """
+        End the game if too few snakes survive the tick; otherwise take the dead ones off the board.
+        """
+        dead = {snake for _, snake, _ in deaths}
+        survivors = [p for p, snake in enumerate(self.snakes, 1) if snake.alive and snake not in dead]
+        for player_num, snake, cause in deaths:
+            events.append(("death", player_num, cause))
+        if deaths[0][2] == "board_full" or len(survivors) <= (0 if self.players == 1 else 1):
+            # Snakes that died on the last tick stay on the board for the final frame
+            player_num, _, cause = deaths[0]
+            self.game_over = True
+            self.death_cause = cause
+            self.winner = survivors[0] if len(survivors) == 1 else (player_num if cause == "board_full" else 0)
+            events.append(("game_over", player_num, cause))
+            return
+        board = self.board
+        for _, snake, _ in deaths:
+            snake.alive = False
+            for segment in snake.body:
+                board.remove_snake(board.cell(segment))
+        # A head that ran into another snake leaves that snake's segment behind; hand the cell back
+        for _, snake, _ in deaths:
+            head = snake.head_cell
+            if head >= 0 and board.snake_cells[head]:
+                for other in self.snakes:
+                    if other.alive and snake.body[0] in other.body:
+                        board.owner[head] = other.player_number
+                        break
+
+    def check_collision(self, snake, player_num, events):
+        """
+        Resolve what a snake's head landed on. Returns the cause of death, or None if it survives.
+        """
+        # Snake eats food
+        if snake.body[0] == self.food.position:
+            snake.grow()
+            self.score[player_num-1] += NORMAL_FOOD_SCORE
+            events.append(("food", player_num))
+            # Waiting power-ups must not block the last free cells
+            while not self.food.randomize_position() and self.power_ups.items:
+                self.power_ups.collect(next(iter(self.power_ups.items)))
+            if self.food.position is None:
+                # No empty cell left for the food: the board is full and the game is won
+                self.board_full = True
+                return "board_full"
+
+        # Snake collects power-up; picking up an effect that is still running extends it
+        power_up_type = self.power_ups.collect(snake.head_cell) if self.power_ups.items else None
+        if power_up_type is not None:
+            until = snake.activate_power_up(power_up_type, self.tick)
+            self.scheduler.schedule(until, "expire", (player_num, POWER_UP_TYPES.index(power_up_type), until))
+            self.score[player_num-1] += SPEED_BOOST_SCORE
+            events.append(("power_up", player_num, power_up_type))
+
+        # Snake hits wall
+        head = snake.head_cell
+        if head < 0:
+            return "wall"
+
+        # Snake hits obstacles
+        if not snake.ghost_mode and not snake.shield_mode and self.board.obstacle_cells[head]:
+            return "obstacle"
+
+        # Snake hits itself or other snake: the head is the only segment allowed on its cell
+        if self.board.snake_cells[head] > 1:
+            if any(other is not snake and other.alive and other.head_cell == head for other in self.snakes):
+                return "head_on"
+            # Only look through the body once we know something is there
+            return "self" if snake.body.count(snake.body[0]) > 1 else "snake"
+        return None
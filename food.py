@@ -1,18 +1,27 @@
 import pygame
-import random
+from board import Board
 from settings import *
 
 class Food:
-    def __init__(self):
+    def __init__(self, board=None):
+        self.board = board if board is not None else Board()
+        self.position = None
         self.randomize_position()
         
     def randomize_position(self):
-        columns = WINDOW_WIDTH // GRID_SIZE
-        rows = WINDOW_HEIGHT // GRID_SIZE
-        self.position = (
-            random.randint(0, columns - 1) * GRID_SIZE,
-            random.randint(0, rows - 1) * GRID_SIZE
-        )
+        """
+        Move the food to a random empty cell. Returns False if the board is full.
+        """
+        if self.position is not None:
+            self.board.remove_item(self.board.cell(self.position))
+            self.position = None
+        cell = self.board.random_free_cell()
+        if cell < 0:
+            return False
+        self.board.add_item(cell)
+        self.position = self.board.position(cell)
+        return True
         
     def draw(self, screen):
-        pygame.draw.rect(screen, RED, (self.position[0], self.position[1], GRID_SIZE - 1, GRID_SIZE - 1)) 
\ No newline at end of file
+        if self.position is not None:
+            pygame.draw.rect(screen, RED, (self.position[0], self.position[1], GRID_SIZE - 1, GRID_SIZE - 1))
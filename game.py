@@ -1,280 +1,570 @@
+from startup import timer as startup_timer  # first, so the imports below can be timed
+import argparse
+import heapq
 import pygame
+import os
 import sys
-from snake import Snake
-from food import Food
-from power_up import PowerUp
-from obstacle import Obstacle
-from sound_manager import SoundManager
+import threading
+import time
+from engine import Engine, TICK_MS
+from input_queue import InputQueue
+from netclient import NetClient
+from profiler import FrameProfiler
+from autopilot import Autopilot
+from camera import CameraRenderer
+from renderer import DirtyRenderer
+from replay import ReplayRecorder
+from snapshot import Autosave
+from text_cache import TextCache
+from menu import Menu
+from sound_manager import SilentSoundManager
 from settings import *
 
+MENU_OPTIONS = {"1 Player": "1P", "2 Players": "2P", "Arena": "ARENA", "Quit": None}  # label -> game mode
+PAUSE_KEYS = (pygame.K_ESCAPE, pygame.K_p)
+
 
 class Game:
-    def __init__(self):
-        pygame.init()
+    def __init__(self, audio=True, headless=False, board_size=None, autopilot=(), server=None, room="default"):
+        if headless:
+            os.environ["SDL_VIDEODRIVER"] = "dummy"
+        # Only bring up what the menu needs; audio follows on a background thread
+        pygame.display.init()
+        pygame.font.init()
         self.screen = pygame.display.set_mode((WINDOW_WIDTH, WINDOW_HEIGHT))
         pygame.display.set_caption("Enhanced Snake Game")
+        startup_timer.mark("display ready")
         self.clock = pygame.time.Clock()
-        self.sound_manager = SoundManager()
-        self.game_state = "MENU"  # MENU, PLAYING, GAME_OVER
-        self.game_mode = "1P"     # 1P or 2P
-        self.reset_game()
-        
-    def reset_game(self):
-        self.score = [0, 0]  # [P1_score, P2_score]
+        self.sound_manager = SilentSoundManager()
+        if audio:
+            threading.Thread(target=self.load_audio, daemon=True).start()
+        self.game_state = "MENU"  # MENU, PLAYING, PAUSED, GAME_OVER
+        self.game_mode = "1P"     # 1P, 2P or ARENA
+        self.engine = None        # created when a game starts
+        self.autopilot_players = set(autopilot)  # players steered by the autopilot
+        self.autopilots = []
+        self.server = server      # (host, port) to play on, or None to play locally
+        self.room = room
+        self.client = None
+        self.set_board_size(board_size or (WINDOW_WIDTH // GRID_SIZE, WINDOW_HEIGHT // GRID_SIZE))
         self.game_font = pygame.font.Font(None, 42)
-        self.snake1 = Snake(player_number=1)
-        self.snake2 = Snake(player_number=2) if self.game_mode == "2P" else None
-        self.food = Food()
-        self.power_up = PowerUp()
-        self.obstacles = Obstacle()
+        self.text = TextCache(self.game_font)
+        self.main_menu = None       # static screens, built when first shown
+        self.overlay_menu = None    # pause or game-over screen over the last frame of the game
+        self.shown_screen = None
+        self.autosave = Autosave()
+        self.video = None           # FrameWriter recording what is played, if any
+        self.profiler = FrameProfiler()
+        self.profiler_font = None  # created the first time the overlay is shown
+        startup_timer.mark("font ready")
         
-    def handle_menu_input(self):
-        mouse_pos = pygame.mouse.get_pos()
-        for event in pygame.event.get():
+    def load_audio(self):
+        from sound_manager import SoundManager
+        try:
+            self.sound_manager = SoundManager()
+        except pygame.error as e:
+            print(f"Audio disabled: {e}")
+            return
+        startup_timer.mark("audio ready")
+        if startup_timer.enabled:
+            print(f"Audio ready after {startup_timer.marks[-1][1] * 1000:.1f} ms")
+        
+    def set_board_size(self, board_size):
+        self.board_size = board_size
+        # Boards larger than the window are drawn through cameras that follow the snakes
+        columns, rows = board_size
+        fits_window = columns * GRID_SIZE <= WINDOW_WIDTH and rows * GRID_SIZE <= WINDOW_HEIGHT
+        self.camera = None if fits_window else CameraRenderer(self)
+        self.renderer = DirtyRenderer(self) if DIRTY_RECT_RENDERING and fits_window else None
+        
+    def reset_game(self, engine=None):
+        """
+        Start a new game, or carry on with an engine restored from a snapshot.
+        """
+        if self.server is not None:
+            self.connect()
+            return
+        if engine is None:
+            columns, rows = self.board_size
+            try:
+                engine = Engine(self.game_mode, columns=columns, rows=rows)
+            except ValueError as e:
+                print(f"Could not start the game: {e}")
+                self.game_state = "MENU"
+                return
+        self.engine = engine
+        self.engine.profiler = self.profiler
+        # Everyone but player 1 is a computer player in a local arena
+        pilots = self.autopilot_players
+        if self.game_mode == "ARENA":
+            pilots = pilots | set(range(2, len(self.engine.snakes) + 1))
+        self.autopilots = [Autopilot(self.engine, player_num) for player_num in sorted(pilots)
+                           if player_num <= len(self.engine.snakes)]
+        self.accumulator = 0.0    # real time not yet simulated, in ms
+        self.input_queue = InputQueue(self.engine, profiler=self.profiler)  # turns waiting for a snake to move
+        # A continued game can't be replayed: the inputs before the snapshot are gone
+        self.recorder = ReplayRecorder(self.engine) if RECORD_REPLAYS and self.engine.tick == 0 else None
+        self.autosave.start(self.engine)
+        
+    def continue_game(self):
+        """
+        Pick up the autosaved game where it was left.
+        """
+        try:
+            engine = self.autosave.load().restore()
+        except (OSError, ValueError) as e:
+            print(f"Could not continue the saved game: {e}")
+            self.autosave.discard()
+            return
+        board_size = (engine.columns, engine.rows)
+        if board_size != self.board_size:
+            self.set_board_size(board_size)
+        self.game_mode = engine.game_mode
+        self.game_state = "PLAYING"
+        self.reset_game(engine)
+        
+    def pause(self):
+        self.game_state = "PAUSED"
+        self.autosave.save(self.engine)
+        
+    def quit(self):
+        """
+        Exit, saving a local game in progress first so it can be continued next time.
+        """
+        if self.game_state in ("PLAYING", "PAUSED") and self.client is None and self.engine is not None \
+                and not self.engine.game_over:
+            self.autosave.save(self.engine)
+        self.autosave.flush()
+        if self.video is not None:
+            written = self.video.close()
+            print(f"Recorded {written} frames to {self.video.path} ({self.video.dropped} dropped)")
+        pygame.quit()
+        sys.exit()
+        
+    def connect(self):
+        """
+        Join a game on the server; the engine arrives with the server's first keyframe.
+        """
+        self.disconnect()
+        host, port = self.server
+        try:
+            self.client = NetClient(host, port, self.room, self.game_mode)
+        except OSError as e:
+            print(f"Could not connect to {host}:{port}: {e}")
+            self.game_state = "MENU"
+            return
+        self.engine = None
+        self.autopilots = []
+        self.recorder = None
+        
+    def disconnect(self):
+        if self.client is not None:
+            self.client.close()
+            self.client = None
+            self.engine = None
+            pygame.display.set_caption("Enhanced Snake Game")
+        
+    def update_network(self):
+        """
+        Apply what the server sent since the last frame.
+        """
+        client = self.client
+        events = client.poll()
+        if client.engine is not self.engine:
+            # A new game: the first one, or the room restarted after a game over
+            self.engine = client.engine
+            pygame.display.set_caption(f"Enhanced Snake Game - Player {client.player_num} in room {self.room}")
+            if self.game_state == "GAME_OVER" and not self.engine.game_over:
+                self.game_state = "PLAYING"
+        self.handle_game_events(events)
+        if not client.connected:
+            print(f"Left the server: {client.refused or 'connection closed'}")
+            if client.turns_dropped:
+                print(f"{client.turns_dropped} turns could not be sent")
+            self.disconnect()
+            self.game_state = "MENU"
+        
+    @property
+    def player_num(self):
+        """
+        The player this window controls: the one the server gave us, or player 1 locally.
+        """
+        return self.client.player_num if self.client is not None and self.client.player_num else 1
+        
+    def toggle_autopilot(self, player_num):
+        self.autopilot_players ^= {player_num}
+        if self.engine is not None and self.client is None:
+            self.autopilots = [pilot for pilot in self.autopilots if pilot.player_num != player_num]
+            if player_num in self.autopilot_players and player_num <= len(self.engine.snakes):
+                self.autopilots.append(Autopilot(self.engine, player_num))
+        
+    def static_screen(self):
+        """
+        The Menu object for the menu, pause or game-over screen, built the first time it is shown.
+        """
+        if self.game_state == "MENU":
+            options = list(MENU_OPTIONS)
+            if self.server is None and self.autosave.exists():
+                options.insert(0, "Continue")
+            if self.main_menu is None or self.main_menu.options != options:
+                self.main_menu = Menu(self.screen, self.text, options, [("Snake Game", WINDOW_HEIGHT/2 - 120)])
+            menu = self.main_menu
+        else:
+            if self.overlay_menu is None:
+                # The last frame is still on the screen; darken it once and keep it as the background
+                background = self.screen.copy()
+                shade = pygame.Surface(background.get_size())
+                shade.fill(BLACK)
+                shade.set_alpha(128)
+                background.blit(shade, (0, 0))
+                if self.game_state == "PAUSED":
+                    options, lines = ["Resume", "Menu", "Quit"], [("Paused", WINDOW_HEIGHT/2 - 60)]
+                else:
+                    options, lines = ["Menu", "Quit"], self.game_over_lines()
+                self.overlay_menu = Menu(self.screen, self.text, options, lines, background, top=WINDOW_HEIGHT/2 + 20)
+            menu = self.overlay_menu
+        if menu is not self.shown_screen:
+            self.shown_screen = menu
+            menu.invalidate()
+            menu.hover(pygame.mouse.get_pos())
+        return menu
+
+    def update_static_screen(self):
+        """
+        Sleep until there is input for the menu, pause or game-over screen, act on it, and redraw
+        the screen only if it changed. Returns whether anything was drawn.
+        """
+        menu = self.static_screen()
+        # A networked game over has to keep reading from the server, which restarts the game
+        timeout = 1000 // DISPLAY_FPS if self.client is not None else IDLE_WAIT_MS
+        events = pygame.event.get()
+        if not events and not menu.dirty:
+            events.append(pygame.event.wait(timeout))
+        choice = None
+        for event in events:
             if event.type == pygame.QUIT:
-                pygame.quit()
-                sys.exit()
-            if event.type == pygame.MOUSEBUTTONDOWN:
-                # 1P button
-                if WINDOW_WIDTH/2 - 100 <= mouse_pos[0] <= WINDOW_WIDTH/2 + 100:
-                    if WINDOW_HEIGHT/2 - 60 <= mouse_pos[1] <= WINDOW_HEIGHT/2 - 20:
-                        self.game_mode = "1P"
-                        self.game_state = "PLAYING"
-                        self.reset_game()
-                    # 2P button
-                    elif WINDOW_HEIGHT/2 <= mouse_pos[1] <= WINDOW_HEIGHT/2 + 40:
-                        self.game_mode = "2P"
-                        self.game_state = "PLAYING"
-                        self.reset_game()
-                    # Quit button
-                    elif WINDOW_HEIGHT/2 + 60 <= mouse_pos[1] <= WINDOW_HEIGHT/2 + 100:
-                        pygame.quit()
-                        sys.exit()
+                self.quit()
+            if choice is None:
+                choice = menu.handle_input(event)
+                if self.game_state == "PAUSED" and event.type == pygame.KEYDOWN and event.key in PAUSE_KEYS:
+                    choice = "Resume"
+
+        if choice == "Quit":
+            self.quit()
+        elif choice == "Menu":
+            self.game_state = "MENU"
+            self.disconnect()
+            self.autosave.flush()  # so the menu knows whether there is a game to continue
+        elif choice == "Resume":
+            self.game_state = "PLAYING"
+            if self.renderer is not None:
+                self.renderer.invalidate()
+        elif choice == "Continue":
+            self.continue_game()
+        elif choice is not None:
+            self.game_mode = MENU_OPTIONS[choice]
+            self.game_state = "PLAYING"
+            self.reset_game()
+        if self.game_state == "GAME_OVER" and self.client is not None:
+            self.update_network()
+
+        if self.game_state not in ("PAUSED", "GAME_OVER"):
+            self.overlay_menu = None
+        if self.game_state == "PLAYING":
+            self.shown_screen = None
+            return False
+        return self.static_screen().draw()
         
     def handle_game_input(self):
+        actions = []
         for event in pygame.event.get():
             if event.type == pygame.QUIT:
-                pygame.quit()
-                sys.exit()
+                self.quit()
             if event.type == pygame.KEYDOWN:
+                # Pausing a local game saves it, so it can also be continued later from the menu
+                if event.key in PAUSE_KEYS and self.client is None and self.engine is not None:
+                    self.pause()
+                    break
                 # Player 1 controls
-                if event.key in P1_CONTROLS and self.snake1.direction != self.get_opposite_direction(P1_CONTROLS[event.key]):
-                    self.snake1.direction = P1_CONTROLS[event.key]
+                if event.key in P1_CONTROLS:
+                    actions.append((1, P1_CONTROLS[event.key]))
                 # Player 2 controls
-                if self.game_mode == "2P" and event.key in P2_CONTROLS and self.snake2.direction != self.get_opposite_direction(P2_CONTROLS[event.key]):
-                    self.snake2.direction = P2_CONTROLS[event.key]
+                if self.game_mode == "2P" and event.key in P2_CONTROLS:
+                    actions.append((2, P2_CONTROLS[event.key]))
+                # Autopilot toggles
+                if event.key == pygame.K_F1:
+                    self.toggle_autopilot(1)
+                elif event.key == pygame.K_F2 and self.game_mode == "2P":
+                    self.toggle_autopilot(2)
+                # Profiler overlay and trace export
+                if event.key == pygame.K_F3:
+                    self.profiler.toggle_overlay()
+                elif event.key == pygame.K_F4 and self.profiler.frame_count:
+                    path = os.path.join(PROFILE_DIR, time.strftime("trace-%Y%m%d-%H%M%S.json"))
+                    print(f"Profile trace saved to {self.profiler.export_trace(path)}")
+        # Keys don't steer snakes that are on autopilot
+        return [action for action in actions if action[0] not in self.autopilot_players]
     
-    def get_opposite_direction(self, direction):
-        opposites = {"UP": "DOWN", "DOWN": "UP", "LEFT": "RIGHT", "RIGHT": "LEFT"}
-        return opposites.get(direction, "")
+    def handle_game_events(self, events):
+        for event in events:
+            if event[0] == "food":
+                self.sound_manager.play_collect_sound()
+            elif event[0] == "power_up":
+                self.sound_manager.play_power_up_sound()
+            elif event[0] == "game_over":
+                self.sound_manager.play_game_over_sound()
+                self.game_state = "GAME_OVER"
+                if self.client is None:
+                    self.autosave.discard()
+                self.save_replay()
     
-    def check_collision(self, snake, player_num):
-        # Snake eats food
-        if snake.body[0] == self.food.position:
-            snake.grow()
-            self.food.randomize_position()
-            self.score[player_num-1] += NORMAL_FOOD_SCORE
-            self.sound_manager.play_collect_sound()
-        
-        # Snake collects power-up
-        if self.power_up.active and snake.body[0] == self.power_up.position:
-            power_up_type = self.power_up.collect()
-            snake.activate_power_up(power_up_type, pygame.time.get_ticks())
-            self.score[player_num-1] += SPEED_BOOST_SCORE
-            self.sound_manager.play_power_up_sound()
-            
-        # Snake hits wall
-        if not snake.ghost_mode:
-            if not (0 <= snake.body[0][0] < WINDOW_WIDTH and 0 <= snake.body[0][1] < WINDOW_HEIGHT):
-                return True
-            
-        # Snake hits obstacles
-        if not snake.ghost_mode and not snake.shield_mode and snake.body[0] in self.obstacles.positions:
-            return True
-            
-        # Snake hits itself or other snake
-        if snake.body[0] in snake.body[1:]:
-            return True
-            
-        if self.game_mode == "2P":
-            other_snake = self.snake2 if player_num == 1 else self.snake1
-            if snake.body[0] in other_snake.body:
-                return True
-                
-        return False
+    def save_replay(self):
+        if self.recorder is not None:
+            name = f"{time.strftime('%Y%m%d-%H%M%S')}-{self.engine.seed}.replay"
+            self.recorder.save(os.path.join(REPLAY_DIR, name), self.engine.tick)
     
-    def draw_menu(self):
-        self.screen.fill(BLACK)
-        title = self.game_font.render("Snake Game", True, WHITE)
-        title_rect = title.get_rect(center=(WINDOW_WIDTH/2, WINDOW_HEIGHT/2 - 120))
-        self.screen.blit(title, title_rect)
-        
-        mouse_pos = pygame.mouse.get_pos()
-        
-        # 1P button
-        self.draw_button("1 Player", 
-            (WINDOW_WIDTH/2 - 100, WINDOW_HEIGHT/2 - 60),
-            WINDOW_WIDTH/2 - 100 <= mouse_pos[0] <= WINDOW_WIDTH/2 + 100 and \
-            WINDOW_HEIGHT/2 - 60 <= mouse_pos[1] <= WINDOW_HEIGHT/2 - 20)
-            
-        # 2P button
-        self.draw_button("2 Players", 
-            (WINDOW_WIDTH/2 - 100, WINDOW_HEIGHT/2),
-            WINDOW_WIDTH/2 - 100 <= mouse_pos[0] <= WINDOW_WIDTH/2 + 100 and \
-            WINDOW_HEIGHT/2 <= mouse_pos[1] <= WINDOW_HEIGHT/2 + 40)
-            
-        # Quit button
-        self.draw_button("Quit", 
-            (WINDOW_WIDTH/2 - 100, WINDOW_HEIGHT/2 + 60),
-            WINDOW_WIDTH/2 - 100 <= mouse_pos[0] <= WINDOW_WIDTH/2 + 100 and \
-            WINDOW_HEIGHT/2 + 60 <= mouse_pos[1] <= WINDOW_HEIGHT/2 + 100)
-    
-    def draw_button(self, text, position, hover=False):
-        button_rect = pygame.Rect(position[0], position[1], MENU_BUTTON_WIDTH, MENU_BUTTON_HEIGHT)
-        color = GRAY if hover else (80, 80, 80)
-        pygame.draw.rect(self.screen, color, button_rect)
-        pygame.draw.rect(self.screen, WHITE, button_rect, 2)
-        
-        button_text = self.game_font.render(text, True, WHITE)
-        text_rect = button_text.get_rect(center=button_rect.center)
-        self.screen.blit(button_text, text_rect)
-        return button_rect
-    
-    def draw_game_over_screen(self):
-        overlay = pygame.Surface((WINDOW_WIDTH, WINDOW_HEIGHT))
-        overlay.fill(BLACK)
-        overlay.set_alpha(128)
-        self.screen.blit(overlay, (0, 0))
-        
+    def game_over_lines(self):
+        """
+        The result of the game, as (text, y) lines for the game-over screen.
+        """
+        engine = self.engine
         if self.game_mode == "1P":
-            game_over_text = self.game_font.render(f"Game Over! Score: {self.score[0]}", True, WHITE)
+            title = "You Win!" if engine.board_full else "Game Over!"
+            return [(f"{title} Score: {engine.score[0]}", WINDOW_HEIGHT/2 - 60)]
+        if self.game_mode == "ARENA":
+            winner = f"Player {engine.winner} wins!" if engine.winner else "Nobody survives!"
+            score = engine.score[self.player_num - 1]
+            rank = 1 + sum(other > score for other in engine.score)
+            return [(f"Game Over! {winner}", WINDOW_HEIGHT/2 - 60),
+                    (f"Your score: {score} (#{rank} of {len(engine.score)})", WINDOW_HEIGHT/2)]
+        winner = "Player 1" if engine.score[0] > engine.score[1] else "Player 2" if engine.score[1] > engine.score[0] else "Tie"
+        return [(f"Game Over! {winner} wins!", WINDOW_HEIGHT/2 - 60),
+                (f"P1: {engine.score[0]} - P2: {engine.score[1]}", WINDOW_HEIGHT/2)]
+    
+    def draw_waiting(self):
+        if self.engine is not None:
+            self.draw_game()
         else:
-            winner = "Player 1" if self.score[0] > self.score[1] else "Player 2" if self.score[1] > self.score[0] else "Tie"
-            game_over_text = self.game_font.render(f"Game Over! {winner} wins!", True, WHITE)
-            scores_text = self.game_font.render(f"P1: {self.score[0]} - P2: {self.score[1]}", True, WHITE)
-            scores_rect = scores_text.get_rect(center=(WINDOW_WIDTH/2, WINDOW_HEIGHT/2))
-            self.screen.blit(scores_text, scores_rect)
+            self.screen.fill(BLACK)
+        waiting_text = self.text.render("Waiting for more players...", WHITE)
+        self.screen.blit(waiting_text, waiting_text.get_rect(center=(WINDOW_WIDTH/2, WINDOW_HEIGHT/2)))
         
-        text_rect = game_over_text.get_rect(center=(WINDOW_WIDTH/2, WINDOW_HEIGHT/2 - 60))
-        self.screen.blit(game_over_text, text_rect)
-        
-        mouse_pos = pygame.mouse.get_pos()
-        
-        # Menu button
-        self.draw_button("Menu", 
-            (WINDOW_WIDTH/2 - 100, WINDOW_HEIGHT/2 + 20),
-            WINDOW_WIDTH/2 - 100 <= mouse_pos[0] <= WINDOW_WIDTH/2 + 100 and \
-            WINDOW_HEIGHT/2 + 20 <= mouse_pos[1] <= WINDOW_HEIGHT/2 + 60)
-        
-        # Quit button
-        self.draw_button("Quit", 
-            (WINDOW_WIDTH/2 - 100, WINDOW_HEIGHT/2 + 80),
-            WINDOW_WIDTH/2 - 100 <= mouse_pos[0] <= WINDOW_WIDTH/2 + 100 and \
-            WINDOW_HEIGHT/2 + 80 <= mouse_pos[1] <= WINDOW_HEIGHT/2 + 120)
+    def draw_game(self, alpha=None):
+        self.screen.fill(BLACK)
+        for snake in self.engine.snakes:
+            if not snake.alive:
+                continue
+            progress = 1.0
+            if alpha is not None and INTERPOLATE_MOVEMENT and not self.engine.game_over:
+                progress = self.engine.move_progress(snake, alpha)
+            snake.draw(self.screen, progress=progress)
+        self.profiler.lap("draw_snakes")
+        self.engine.food.draw(self.screen)
+        self.profiler.lap("draw_food")
+        self.engine.power_ups.draw(self.screen)
+        self.profiler.lap("draw_power_up")
+        self.engine.obstacles.draw(self.screen)
+        self.profiler.lap("draw_obstacles")
     
     def draw_score(self):
+        rects = []
+        engine = self.engine
         if self.game_mode == "1P":
-            score_text = self.game_font.render(f"Score: {self.score[0]}", True, WHITE)
-            self.screen.blit(score_text, (20, 20))
+            score_text = self.text.field("score", f"Score: {engine.score[0]}", WHITE)
+            rects.append(self.screen.blit(score_text, (20, 20)))
+        elif self.game_mode == "2P":
+            p1_score = self.text.field("p1_score", f"P1: {engine.score[0]}", GREEN)
+            p2_score = self.text.field("p2_score", f"P2: {engine.score[1]}", RED)
+            rects.append(self.screen.blit(p1_score, (20, 20)))
+            rects.append(self.screen.blit(p2_score, (WINDOW_WIDTH - 120, 20)))
         else:
-            p1_score = self.game_font.render(f"P1: {self.score[0]}", True, GREEN)
-            p2_score = self.game_font.render(f"P2: {self.score[1]}", True, RED)
-            self.screen.blit(p1_score, (20, 20))
-            self.screen.blit(p2_score, (WINDOW_WIDTH - 120, 20))
+            rects.extend(self.draw_scoreboard())
         
-        # Draw power-up status for P1
+        # Draw power-up status for P1, or our own snake in an arena
+        me = engine.snakes[self.player_num - 1] if self.game_mode == "ARENA" else engine.snakes[0]
+        rects.extend(self.draw_power_up_status(me, 20))
+        
+        # Draw power-up status for P2 if in 2P mode
+        if self.game_mode == "2P":
+            rects.extend(self.draw_power_up_status(engine.snakes[1], WINDOW_WIDTH - 200))
+        return rects
+    
+    def draw_power_up_status(self, snake, x):
+        rects = []
         y_offset = 60
-        if self.snake1.speed_boost:
-            status_text = self.game_font.render("Speed Boost!", True, BLUE)
-            self.screen.blit(status_text, (20, y_offset))
+        if snake.speed_boost:
+            status_text = self.text.render("Speed Boost!", BLUE)
+            rects.append(self.screen.blit(status_text, (x, y_offset)))
             y_offset += 40
-        if self.snake1.ghost_mode:
-            status_text = self.game_font.render("Ghost Mode!", True, PURPLE)
-            self.screen.blit(status_text, (20, y_offset))
+        if snake.ghost_mode:
+            status_text = self.text.render("Ghost Mode!", PURPLE)
+            rects.append(self.screen.blit(status_text, (x, y_offset)))
             y_offset += 40
-        if self.snake1.shield_mode:
-            status_text = self.game_font.render("Shield!", True, CYAN)
-            self.screen.blit(status_text, (20, y_offset))
+        if snake.shield_mode:
+            status_text = self.text.render("Shield!", CYAN)
+            rects.append(self.screen.blit(status_text, (x, y_offset)))
+        return rects
+    
+    def draw_scoreboard(self):
+        """
+        Arena HUD: our own score on the left; how many snakes are left and the top three on the right.
+        The same handful of fields are drawn however many snakes there are.
+        """
+        engine = self.engine
+        me = engine.snakes[self.player_num - 1]
+        color = me.get_snake_color(False) if me.alive else GRAY
+        own_score = self.text.field("p1_score", f"P{self.player_num}: {engine.score[self.player_num - 1]}", color)
+        rects = [self.screen.blit(own_score, (20, 20))]
         
-        # Draw power-up status for P2 if in 2P mode
-        if self.game_mode == "2P":
-            y_offset = 60
-            if self.snake2.speed_boost:
-                status_text = self.game_font.render("Speed Boost!", True, BLUE)
-                self.screen.blit(status_text, (WINDOW_WIDTH - 200, y_offset))
-                y_offset += 40
-            if self.snake2.ghost_mode:
-                status_text = self.game_font.render("Ghost Mode!", True, PURPLE)
-                self.screen.blit(status_text, (WINDOW_WIDTH - 200, y_offset))
-                y_offset += 40
-            if self.snake2.shield_mode:
-                status_text = self.game_font.render("Shield!", True, CYAN)
-                self.screen.blit(status_text, (WINDOW_WIDTH - 200, y_offset))
+        alive = sum(snake.alive for snake in engine.snakes)
+        alive_text = self.text.field("alive", f"Alive: {alive}/{len(engine.snakes)}", WHITE)
+        rects.append(self.screen.blit(alive_text, (WINDOW_WIDTH - 200, 20)))
+        leaders = heapq.nlargest(3, range(len(engine.score)), key=engine.score.__getitem__)
+        for place, i in enumerate(leaders):
+            snake = engine.snakes[i]
+            color = snake.get_snake_color(False) if snake.alive else GRAY
+            text = self.text.field(f"leader{place}", f"{place + 1}. P{i + 1}: {engine.score[i]}", color)
+            rects.append(self.screen.blit(text, (WINDOW_WIDTH - 200, 60 + 36 * place)))
+        return rects
     
-    def handle_game_over_input(self):
-        mouse_pos = pygame.mouse.get_pos()
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                pygame.quit()
-                sys.exit()
-            if event.type == pygame.MOUSEBUTTONDOWN:
-                # Menu button
-                if WINDOW_WIDTH/2 - 100 <= mouse_pos[0] <= WINDOW_WIDTH/2 + 100 and \
-                   WINDOW_HEIGHT/2 + 20 <= mouse_pos[1] <= WINDOW_HEIGHT/2 + 60:
-                    self.game_state = "MENU"
-                # Quit button
-                elif WINDOW_WIDTH/2 - 100 <= mouse_pos[0] <= WINDOW_WIDTH/2 + 100 and \
-                     WINDOW_HEIGHT/2 + 80 <= mouse_pos[1] <= WINDOW_HEIGHT/2 + 120:
-                    pygame.quit()
-                    sys.exit()
+    def update_simulation(self, frame_time):
+        """
+        Run as many fixed simulation ticks as the elapsed frame time covers.
+        Returns the fraction of a tick left over, for interpolation.
+        """
+        self.accumulator += frame_time
+        ticks = 0
+        while self.accumulator >= TICK_MS and self.game_state == "PLAYING":
+            actions = self.input_queue.actions()
+            for pilot in self.autopilots:
+                action = pilot.action()
+                if action is not None:
+                    actions.append(action)
+            if self.recorder is not None:
+                self.recorder.record(self.engine.tick, actions)
+            events = self.engine.step(actions)
+            self.handle_game_events(events)
+            self.accumulator -= TICK_MS
+            ticks += 1
+            if ticks == MAX_TICKS_PER_FRAME:
+                # Too far behind (slow frame or a stall); drop the backlog instead of spiralling
+                self.accumulator = 0.0
+        self.autosave.update(self.engine)
+        return self.accumulator / TICK_MS
     
     def run(self):
+        frame_time = 0
+        self.first_frame_shown = False
+        profiler = self.profiler
         while True:
-            # Initialize game_speed with default value
-            game_speed = 60  # Default FPS for MENU and GAME_OVER states
+            update_rects = None  # Screen rects changed this frame, or None to flip the whole display
+            idle = self.game_state in ("MENU", "PAUSED", "GAME_OVER")
 
-            if self.game_state == "MENU":
-                self.handle_menu_input()
-                self.draw_menu()
+            if idle:
+                # Static screens wait for input instead of redrawing every frame
+                update_rects = None if self.update_static_screen() else []
             
             elif self.game_state == "PLAYING":
-                self.handle_game_input()
-                
-                # Update game_speed based on power-ups
-                game_speed = GAME_SPEED * 2 if self.snake1.speed_boost else GAME_SPEED
-                
-                # Update snakes
-                self.snake1.move()
-                self.snake1.update_power_ups(pygame.time.get_ticks())
-                if self.game_mode == "2P":
-                    self.snake2.move()
-                    self.snake2.update_power_ups(pygame.time.get_ticks())
-                
-                self.power_up.spawn_power_up()
-                
-                # Check collisions
-                if self.check_collision(self.snake1, 1) or \
-                   (self.game_mode == "2P" and self.check_collision(self.snake2, 2)):
-                    self.sound_manager.play_game_over_sound()
-                    self.game_state = "GAME_OVER"
+                profiler.begin_frame()
+                actions = self.handle_game_input()
+                profiler.lap("events")
+                if self.client is not None:
+                    # Either set of keys steers our own snake; the server decides when it turns
+                    for _, direction in actions:
+                        self.client.send_input(direction)
+                    self.update_network()
+                    alpha = None
+                else:
+                    for player_num, direction in actions:
+                        self.input_queue.push(player_num, direction)
+                    alpha = self.update_simulation(frame_time)
+                profiler.lap("simulation")
                 
                 # Draw game elements
-                self.screen.fill(BLACK)
-                self.snake1.draw(self.screen)
-                if self.game_mode == "2P":
-                    self.snake2.draw(self.screen)
-                self.food.draw(self.screen)
-                self.power_up.draw(self.screen)
-                self.obstacles.draw(self.screen)
-                self.draw_score()
+                if self.game_state == "MENU":
+                    update_rects = []  # left the game; the menu is drawn on the next pass
+                elif self.client is not None and (self.engine is None or not self.client.started):
+                    self.draw_waiting()
+                elif self.camera is not None:
+                    self.camera.draw(alpha)
+                    profiler.lap("draw_view")
+                    self.draw_score()
+                    profiler.lap("draw_score")
+                elif self.renderer is not None and self.game_state == "PLAYING" and not profiler.show_overlay:
+                    update_rects = self.renderer.draw()
+                    profiler.lap("draw_snakes")
+                else:
+                    if self.renderer is not None:
+                        self.renderer.invalidate()
+                    self.draw_game(alpha)
+                    self.draw_score()
+                    profiler.lap("draw_score")
+                if profiler.show_overlay:
+                    if self.profiler_font is None:
+                        self.profiler_font = pygame.font.Font(None, 20)
+                    profiler.draw_overlay(self.screen, self.profiler_font)
+                    profiler.lap("overlay")
+                if self.video is not None:
+                    # Never waits: a frame is dropped if the writer thread is behind
+                    self.video.capture(self.screen)
             
-            elif self.game_state == "GAME_OVER":
-                self.handle_game_over_input()
-                self.draw_game_over_screen()
+            if update_rects is None:
+                pygame.display.flip()
+            else:
+                pygame.display.update(update_rects)
+            profiler.lap("flip")
+            frame_time = self.clock.tick(DISPLAY_FPS)
+            if idle:
+                frame_time = 0  # time spent waiting on a static screen isn't game time
+            profiler.lap("tick_wait")
+            profiler.end_frame()
             
-            pygame.display.flip()
-            self.clock.tick(game_speed)
+            if not self.first_frame_shown:
+                self.first_frame_shown = True
+                startup_timer.mark("first frame")
+                if startup_timer.enabled:
+                    print(startup_timer.report())
+
+def board_size(text):
+    try:
+        columns, rows = (int(n) for n in text.lower().split("x"))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected COLUMNSxROWS, got {text!r}")
+    if columns < 1 or rows < 1:
+        raise argparse.ArgumentTypeError("board must be at least 1x1")
+    return columns, rows
+
+def server_address(text):
+    host, _, port = text.partition(":")
+    try:
+        return host, int(port) if port else SERVER_PORT
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected HOST[:PORT], got {text!r}")
 
 if __name__ == "__main__":
-    game = Game()
+    parser = argparse.ArgumentParser(description="Enhanced Snake Game")
+    parser.add_argument("--no-audio", action="store_true", help="don't initialize the mixer or load sounds")
+    parser.add_argument("--headless", action="store_true", help="run without a window or audio")
+    parser.add_argument("--startup-report", action="store_true", help="print import and startup timings")
+    parser.add_argument("--board", type=board_size, metavar="COLUMNSxROWS",
+                        help="board size in cells, e.g. 2000x2000 (default: the window)")
+    parser.add_argument("--autopilot", type=int, choices=(1, 2), action="append", default=[],
+                        metavar="PLAYER", help="let the computer steer this player (F1/F2 toggle in game)")
+    parser.add_argument("--connect", type=server_address, metavar="HOST[:PORT]",
+                        help="play on a game server (see server.py) instead of locally")
+    parser.add_argument("--room", default="default", help="room to join on the server")
+    parser.add_argument("--profile", action="store_true", help="time frame phases from the start (F3 shows them)")
+    parser.add_argument("--record-video", metavar="PATH",
+                        help="record played frames to a .raw stream or a directory of PNGs (see video_export.py)")
+    parser.add_argument("--video-every", type=int, default=1, metavar="N", help="record one frame in N")
+    parser.add_argument("--video-scale", type=float, default=1.0, help="scale recorded frames by this factor")
+    args = parser.parse_args()
+    
+    game = Game(audio=not (args.no_audio or args.headless), headless=args.headless, board_size=args.board,
+                autopilot=args.autopilot, server=args.connect, room=args.room)
+    game.profiler.enabled = args.profile
+    if args.record_video:
+        from video_export import FrameWriter
+        game.video = FrameWriter(args.record_video, game.screen.get_size(), args.video_every, args.video_scale,
+                                 block=False)
     game.run() 
\ No newline at end of file
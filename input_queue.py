@@ -0,0 +1,62 @@
+"""
+This module buffers each player's turns until their snake is ready to take them.
+
+Key presses arrive at display rate, but a snake only changes direction when it moves. Turns are
+queued per player and checked against the last turn already queued rather than the snake's current
+direction, so two quick presses make two turns instead of the second replacing the first, and no
+sequence of presses can reverse a snake into itself. The engine gets one queued turn per snake on
+each tick that snake moves.
+
+When given a profiler, the queue also reports input latency: the real time from a key press to
+the simulated move that carries it out.
+"""
+
+import time
+from collections import deque
+from engine import OPPOSITE_DIRECTIONS
+from settings import *
+
+
+class InputQueue:
+    def __init__(self, engine, size=INPUT_QUEUE_SIZE, profiler=None):
+        self.engine = engine
+        self.size = size
+        self.profiler = profiler
+        self.turns = {}  # player -> deque of (direction, time pressed)
+
+    def push(self, player_num, direction, pressed=None):
+        """
+        Queue a turn. Returns False if it was dropped: the queue is full, the player has no snake,
+        or the turn would keep the snake going the way it already will or reverse it.
+        """
+        engine = self.engine
+        if not 1 <= player_num <= len(engine.snakes) or direction not in OPPOSITE_DIRECTIONS:
+            return False
+        queue = self.turns.get(player_num)
+        if queue is None:
+            queue = self.turns[player_num] = deque()
+        if len(queue) >= self.size:
+            return False
+        last = queue[-1][0] if queue else engine.snakes[player_num - 1].direction
+        if direction == last or direction == OPPOSITE_DIRECTIONS[last]:
+            return False
+        queue.append((direction, time.perf_counter() if pressed is None else pressed))
+        return True
+
+    def actions(self):
+        """
+        Take the next turn of every player whose snake moves on the coming tick, as the
+        (player, direction) actions to pass to Engine.step().
+        """
+        engine = self.engine
+        actions = []
+        for player_num, queue in self.turns.items():
+            if queue and engine.moves_next_tick(engine.snakes[player_num - 1]):
+                direction, pressed = queue.popleft()
+                actions.append((player_num, direction))
+                if self.profiler is not None:
+                    self.profiler.record_input_latency((time.perf_counter() - pressed) * 1000)
+        return actions
+
+    def clear(self):
+        self.turns.clear()
@@ -2,74 +2,98 @@ import pygame
 from settings import *
 
 class Menu:
-    def __init__(self, screen):
+    """
+    A static screen of buttons, picked with the mouse or with the arrow keys and Enter.
+
+    Everything on it is rendered once: the background with its lines of text composited in, and
+    each button both plain and highlighted. draw() then only blits those surfaces, and only when
+    the highlighted button has changed since the last draw.
+    """
+    def __init__(self, screen, text, options, lines=(), background=None, top=WINDOW_HEIGHT/2 - 60):
+        """
+        Args:
+            text (TextCache): renders the button labels and lines.
+            options (list): button labels, top to bottom.
+            lines (list): (text, y) pairs drawn centered above the buttons.
+            background (Surface, optional): image to draw on instead of a black screen.
+            top (int): y of the first button.
+        """
         self.screen = screen
-        self.font = pygame.font.SysFont('Comic Sans MS', 48)
-        self.selected = 0
-        self.options = ['1 Player', '2 Players', 'Quit']
-        
-    def draw_button(self, text, position, selected):
-        button_rect = pygame.Rect(
-            position[0],
-            position[1],
-            MENU_BUTTON_WIDTH,
-            MENU_BUTTON_HEIGHT
-        )
-        
-        # Draw button background
-        color = (100, 100, 100) if selected else (80, 80, 80)
-        pygame.draw.rect(self.screen, color, button_rect)
-        pygame.draw.rect(self.screen, WHITE, button_rect, 2)
-        
-        # Draw text
-        text_surface = self.font.render(text, True, WHITE)
-        text_rect = text_surface.get_rect(center=button_rect.center)
-        self.screen.blit(text_surface, text_rect)
-        
-        return button_rect
-    
-    def draw(self):
-        self.screen.fill(BLACK)
-        
-        # Draw title
-        title = self.font.render("Snake Game", True, WHITE)
-        title_rect = title.get_rect(center=(WINDOW_WIDTH/2, WINDOW_HEIGHT/4))
-        self.screen.blit(title, title_rect)
-        
-        # Draw menu options
-        button_y = WINDOW_HEIGHT/2
+        self.options = options
+        self.selected = None  # index of the highlighted button, if any
+        self.dirty = True
+
+        self.background = background.copy() if background is not None else pygame.Surface(screen.get_size())
+        if background is None:
+            self.background.fill(BLACK)
+        for line, y in lines:
+            surface = text.render(line, WHITE)
+            self.background.blit(surface, surface.get_rect(center=(WINDOW_WIDTH/2, y)))
+
         self.button_rects = []
-        
-        for i, option in enumerate(self.options):
-            button_rect = self.draw_button(
-                option,
-                (WINDOW_WIDTH/2 - MENU_BUTTON_WIDTH/2, button_y),
-                i == self.selected
-            )
-            self.button_rects.append(button_rect)
+        self.button_surfaces = []  # (plain, highlighted) for every button
+        button_y = top
+        for option in options:
+            rect = pygame.Rect(WINDOW_WIDTH/2 - MENU_BUTTON_WIDTH/2, button_y, MENU_BUTTON_WIDTH, MENU_BUTTON_HEIGHT)
+            label = text.render(option, WHITE)
+            self.button_rects.append(rect)
+            self.button_surfaces.append((self.render_button(label, (80, 80, 80)), self.render_button(label, GRAY)))
             button_y += MENU_BUTTON_HEIGHT + MENU_BUTTON_PADDING
-        
-        pygame.display.flip()
-    
+
+    def render_button(self, label, color):
+        surface = pygame.Surface((MENU_BUTTON_WIDTH, MENU_BUTTON_HEIGHT))
+        surface.fill(color)
+        pygame.draw.rect(surface, WHITE, surface.get_rect(), 2)
+        surface.blit(label, label.get_rect(center=surface.get_rect().center))
+        return surface
+
+    def select(self, index):
+        if index != self.selected:
+            self.selected = index
+            self.dirty = True
+
+    def hover(self, mouse_pos):
+        """
+        Highlight the button under the mouse, or none.
+        """
+        self.select(next((i for i, rect in enumerate(self.button_rects) if rect.collidepoint(mouse_pos)), None))
+
+    def invalidate(self):
+        self.dirty = True
+
+    def draw(self):
+        """
+        Redraw the screen if anything changed. Returns whether it did.
+        """
+        if not self.dirty:
+            return False
+        self.screen.blit(self.background, (0, 0))
+        for i, (rect, (plain, highlighted)) in enumerate(zip(self.button_rects, self.button_surfaces)):
+            self.screen.blit(highlighted if i == self.selected else plain, rect)
+        self.dirty = False
+        return True
+
     def handle_input(self, event):
+        """
+        Update the highlight for one event. Returns the label of the button it picked, or None.
+        """
         if event.type == pygame.KEYDOWN:
             if event.key == pygame.K_UP:
-                self.selected = (self.selected - 1) % len(self.options)
+                self.select(len(self.options) - 1 if self.selected is None else (self.selected - 1) % len(self.options))
             elif event.key == pygame.K_DOWN:
-                self.selected = (self.selected + 1) % len(self.options)
-            elif event.key == pygame.K_RETURN:
+                self.select(0 if self.selected is None else (self.selected + 1) % len(self.options))
+            elif event.key in (pygame.K_RETURN, pygame.K_KP_ENTER) and self.selected is not None:
+                return self.options[self.selected]
+
+        elif event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:
+            self.hover(event.pos)
+            if self.selected is not None:
                 return self.options[self.selected]
-        
-        elif event.type == pygame.MOUSEBUTTONDOWN:
-            mouse_pos = pygame.mouse.get_pos()
-            for i, rect in enumerate(self.button_rects):
-                if rect.collidepoint(mouse_pos):
-                    return self.options[i]
-        
+
         elif event.type == pygame.MOUSEMOTION:
-            mouse_pos = pygame.mouse.get_pos()
-            for i, rect in enumerate(self.button_rects):
-                if rect.collidepoint(mouse_pos):
-                    self.selected = i
-        
-        return None 
\ No newline at end of file
+            self.hover(event.pos)
+
+        elif event.type in (pygame.VIDEOEXPOSE, pygame.WINDOWEXPOSED):
+            self.invalidate()
+
+        return None
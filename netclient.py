@@ -0,0 +1,150 @@
+"""
+This module connects to server.py and keeps a local copy of the server's game up to date.
+
+The game uses NetClient when started with --connect. Run on its own, it connects a number of bots
+that turn at random, which is handy for trying a server out over localhost:
+
+    python netclient.py localhost --bots 2 --seconds 10
+"""
+
+import argparse
+import random
+import socket
+import time
+from protocol import (WELCOME, KEYFRAME, DELTA, REFUSED, DIRECTIONS, LENGTH, apply_delta, apply_keyframe,
+                      encode_input, encode_join, read_text)
+from settings import *
+
+
+class NetClient:
+    """
+    A non-blocking connection to a game server. Call poll() once a frame to apply whatever the server
+    sent; engine then holds the current state (None until the first keyframe arrives).
+    """
+    def __init__(self, host, port=SERVER_PORT, room="default", mode="2P"):
+        self.sock = socket.create_connection((host, port), timeout=5)
+        self.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.sock.setblocking(False)
+        self.buffer = bytearray()
+        self.outgoing = bytearray()  # input frames the socket has not taken yet
+        self.engine = None
+        self.player_num = None
+        self.mode = mode
+        self.started = False
+        self.refused = None      # reason, if the server turned us away
+        self.connected = True
+        self.bytes_received = 0
+        self.turns_dropped = 0   # turns asked for before the first keyframe or after disconnecting
+        self.sock.sendall(encode_join(room, mode))
+
+    def send_input(self, direction):
+        """
+        Ask for a turn on the next tick after the latest one we have seen.
+        """
+        if not self.connected or self.engine is None:
+            self.turns_dropped += 1
+            return
+        self.outgoing += encode_input(self.engine.tick, direction)
+        self.flush()
+
+    def flush(self):
+        """
+        Send as much of the queued input as the socket takes, keeping the rest for the next call so
+        frames are never cut short in the stream.
+        """
+        while self.outgoing and self.connected:
+            try:
+                sent = self.sock.send(self.outgoing)
+            except BlockingIOError:
+                break
+            except ConnectionError:
+                self.connected = False
+                break
+            del self.outgoing[:sent]
+
+    def poll(self):
+        """
+        Read and apply everything the server has sent. Returns the game events it reported.
+        """
+        events = []
+        self.flush()
+        while self.connected:
+            try:
+                data = self.sock.recv(65536)
+            except BlockingIOError:
+                break
+            except ConnectionError:
+                data = b""
+            if not data:
+                self.connected = False
+                break
+            self.bytes_received += len(data)
+            self.buffer += data
+
+        pos = 0
+        buffer = self.buffer
+        while len(buffer) - pos >= LENGTH.size:
+            (length,) = LENGTH.unpack_from(buffer, pos)
+            if len(buffer) - pos - LENGTH.size < length:
+                break
+            start = pos + LENGTH.size
+            events.extend(self.handle_message(bytes(buffer[start:start + length])))
+            pos = start + length
+        del buffer[:pos]
+        return events
+
+    def handle_message(self, message):
+        kind = message[0]
+        if kind == WELCOME:
+            self.player_num = message[1]
+            self.mode, _ = read_text(message, 2)
+        elif kind == KEYFRAME:
+            self.engine, self.started = apply_keyframe(message, self.engine)
+        elif kind == DELTA and self.engine is not None:
+            return apply_delta(message, self.engine)
+        elif kind == REFUSED:
+            self.refused, _ = read_text(message, 1)
+            self.close()
+        return []
+
+    def close(self):
+        self.connected = False
+        self.sock.close()
+
+
+def run_bots(host, port, room, count, seconds, mode=None):
+    rng = random.Random()
+    mode = mode or ("2P" if count > 1 else "1P")
+    bots = [NetClient(host, port, room, mode) for _ in range(count)]
+    games = 0
+    start = time.perf_counter()
+    while time.perf_counter() - start < seconds and all(bot.connected for bot in bots):
+        for bot in bots:
+            for event in bot.poll():
+                if event[0] == "game_over" and bot is bots[0]:
+                    games += 1
+                    print(f"tick {bot.engine.tick}: player {event[1]} out ({event[2]}), score {bot.engine.score}")
+            if bot.started and rng.random() < 0.02:
+                bot.send_input(rng.choice(DIRECTIONS))
+        time.sleep(1 / DISPLAY_FPS)
+    elapsed = time.perf_counter() - start
+    for bot in bots:
+        if bot.refused:
+            print(f"refused: {bot.refused}")
+        bot.close()
+    received = sum(bot.bytes_received for bot in bots)
+    dropped = sum(bot.turns_dropped for bot in bots)
+    print(f"{games} games finished in {elapsed:.1f}s, {received / elapsed / count:.0f} bytes/s per client, "
+          f"{dropped} turns dropped")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Connect test bots to a snake server")
+    parser.add_argument("host")
+    parser.add_argument("--port", type=int, default=SERVER_PORT)
+    parser.add_argument("--room", default="bots")
+    parser.add_argument("--bots", type=int, default=2)
+    parser.add_argument("--mode", choices=("1P", "2P", "ARENA"), help="room mode (default: 1P or 2P by bot count)")
+    parser.add_argument("--seconds", type=float, default=10)
+    args = parser.parse_args()
+    run_bots(args.host, args.port, args.room, args.bots, args.seconds, args.mode)
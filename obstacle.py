@@ -1,55 +1,117 @@
 import pygame
-import random
+from board import Board
 from settings import *
 
+# Neighbouring cells in ring order; consecutive entries are edge-adjacent to each other
+RING = [(0, -1), (1, -1), (1, 0), (1, 1), (0, 1), (-1, 1), (-1, 0), (-1, -1)]
+
 class Obstacle:
-    def __init__(self):
+    def __init__(self, board=None, count=OBSTACLE_COUNT, spacing=MIN_OBSTACLE_SPACING):
+        self.board = board if board is not None else Board()
+        self.count = count
+        self.spacing = spacing
         self.positions = []
         self.generate_obstacles()
-    
-    def is_valid_position(self, pos, all_positions):
-        """Check if a position is valid (not too close to other obstacles)"""
-        x, y = pos
-        
-        # Check minimum spacing between obstacles
-        for other_pos in all_positions:
-            ox, oy = other_pos
-            if abs(x - ox) < MIN_OBSTACLE_SPACING * GRID_SIZE and \
-               abs(y - oy) < MIN_OBSTACLE_SPACING * GRID_SIZE:
-                return False
-        
-        # Check if this position would create a surrounded area
-        directions = [(0, 1), (1, 0), (0, -1), (-1, 0)]
-        count_adjacent = 0
-        for dx, dy in directions:
-            check_pos = (x + dx * GRID_SIZE, y + dy * GRID_SIZE)
-            if check_pos in all_positions:
-                count_adjacent += 1
-        
-        return count_adjacent < 2  # Prevent more than 2 adjacent obstacles
-    
+
+    def is_valid_cell(self, cell, spacing_grid):
+        """Check if an obstacle can go on a cell without crowding others or cutting off free cells"""
+        if spacing_grid[cell] or not self.board.is_free(cell):
+            return False
+        return self.keeps_connected(cell)
+
+    def keeps_connected(self, cell):
+        """
+        Check that blocking a cell leaves all of its open neighbours connected to each other
+        through the surrounding ring of cells. If they are, every path that went through the cell
+        can go around it instead, so the open area of the board stays in one piece.
+        """
+        board = self.board
+        x, y = cell % board.columns, cell // board.columns
+        ring = []
+        for dx, dy in RING:
+            nx, ny = x + dx, y + dy
+            ring.append(0 <= nx < board.columns and 0 <= ny < board.rows and
+                        not board.obstacle_cells[ny * board.columns + nx])
+        if all(ring):
+            return True
+
+        # Count the runs of open ring cells that touch one of the four direct neighbours
+        runs = 0
+        start = ring.index(False)
+        in_run = touches = False
+        for i in range(1, 9):
+            k = (start + i) % 8
+            if ring[k]:
+                in_run = True
+                touches = touches or k % 2 == 0
+            elif in_run:
+                runs += touches
+                in_run = touches = False
+        return runs <= 1
+
+    def candidate_cells(self):
+        """
+        Return (n, cell_at): the number of cells obstacles may go on, and a function giving the k-th
+        of them in row-major order. Edges and the area around the center are left out. Candidates
+        are computed rather than listed, so huge boards cost nothing up front.
+        """
+        columns, rows = self.board.columns, self.board.rows
+        center_x, center_y = columns // 2, rows // 2
+        width = max(columns - 2, 0)
+        # Interior columns and rows of the block kept clear around the center
+        left, right = max(1, center_x - 2), min(columns - 2, center_x + 2)
+        top, bottom = max(1, center_y - 2), min(rows - 2, center_y + 2)
+        block_width = max(right - left + 1, 0)
+        block_rows = max(bottom - top + 1, 0) if block_width else 0
+        narrow = width - block_width  # candidates in each row beside the center block
+        before = (top - 1) * width if block_rows else max(rows - 2, 0) * width
+        beside = block_rows * narrow
+        after = max(rows - 2 - (top - 1) - block_rows, 0) * width if block_rows else 0
+
+        def cell_at(k):
+            if k < before:
+                y, x = 1 + k // width, 1 + k % width
+            elif k < before + beside:
+                k -= before
+                y, x = top + k // narrow, 1 + k % narrow
+                if x >= left:
+                    x += block_width
+            else:
+                k -= before + beside
+                y, x = bottom + 1 + k // width, 1 + k % width
+            return y * columns + x
+
+        return before + beside + after, cell_at
+
     def generate_obstacles(self):
-        columns = WINDOW_WIDTH // GRID_SIZE - 2  # Leave space at edges
-        rows = WINDOW_HEIGHT // GRID_SIZE - 2
-        center = (WINDOW_WIDTH // 2, WINDOW_HEIGHT // 2)
-        
-        attempts = 0
-        while len(self.positions) < OBSTACLE_COUNT and attempts < 1000:
-            pos = (
-                (random.randint(1, columns) * GRID_SIZE),
-                (random.randint(1, rows) * GRID_SIZE)
-            )
-            
-            # Ensure obstacles don't spawn at snake's starting position or too close to center
-            if abs(pos[0] - center[0]) < 3 * GRID_SIZE and \
-               abs(pos[1] - center[1]) < 3 * GRID_SIZE:
+        board = self.board
+        columns, rows = board.columns, board.rows
+        spacing = max(self.spacing, 1)
+
+        # Cells within the minimum spacing of a placed obstacle, kept as a grid so the check is O(1)
+        spacing_grid = bytearray(board.size)
+
+        # Shuffle lazily, so only the candidates we actually look at cost anything;
+        # swapped holds just the entries the shuffle has moved
+        n, cell_at = self.candidate_cells()
+        swapped = {}
+        for i in range(n):
+            if len(self.positions) >= self.count:
+                break
+            j = board.rng.randrange(i, n)
+            k = swapped.get(j, j)
+            swapped[j] = swapped.get(i, i)
+            cell = cell_at(k)
+            if not self.is_valid_cell(cell, spacing_grid):
                 continue
-                
-            if self.is_valid_position(pos, self.positions):
-                self.positions.append(pos)
-            
-            attempts += 1
-    
+
+            board.add_obstacle(cell)
+            self.positions.append(board.position(cell))
+            x, y = cell % columns, cell // columns
+            x0, x1 = max(0, x - spacing + 1), min(columns, x + spacing)
+            for ny in range(max(0, y - spacing + 1), min(rows, y + spacing)):
+                spacing_grid[ny * columns + x0:ny * columns + x1] = b'\x01' * (x1 - x0)
+
     def draw(self, screen):
         for pos in self.positions:
-            pygame.draw.rect(screen, YELLOW, (pos[0], pos[1], GRID_SIZE - 1, GRID_SIZE - 1)) 
\ No newline at end of file
+            pygame.draw.rect(screen, YELLOW, (pos[0], pos[1], GRID_SIZE - 1, GRID_SIZE - 1))
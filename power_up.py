@@ -1,39 +1,68 @@
 import pygame
-import random
+from board import Board
 from settings import *
 
-class PowerUp:
-    def __init__(self):
-        self.active = False
-        self.position = (0, 0)
-        self.type = None
-        self.spawn_power_up()
-    
-    def spawn_power_up(self):
-        if random.random() < POWER_UP_SPAWN_CHANCE and not self.active:
-            self.active = True
-            columns = WINDOW_WIDTH // GRID_SIZE
-            rows = WINDOW_HEIGHT // GRID_SIZE
-            self.position = (
-                random.randint(0, columns - 1) * GRID_SIZE,
-                random.randint(0, rows - 1) * GRID_SIZE
-            )
-            self.type = random.choice(['speed', 'ghost', 'shrink', 'shield'])
-    
-    def collect(self):
-        self.active = False
-        return self.type
-    
+POWER_UP_TYPES = ('speed', 'ghost', 'shrink', 'shield')
+POWER_UP_COLORS = {
+    'speed': BLUE,
+    'ghost': PURPLE,
+    'shrink': ORANGE,
+    'shield': CYAN
+}
+
+class PowerUps:
+    """
+    The power-ups lying on the board, up to MAX_POWER_UPS at once. When they appear and disappear
+    is up to the engine's scheduler; each one gets a serial number so a despawn timer can tell
+    whether the power-up it was set for is still there.
+    """
+    def __init__(self, board=None):
+        self.board = board if board is not None else Board()
+        self.items = {}  # cell -> (type, serial)
+        self.next_serial = 0
+
+    def spawn(self):
+        """
+        Put a random power-up on a random empty cell. Returns (cell, serial), or None if there
+        is no room for another one.
+        """
+        if len(self.items) >= MAX_POWER_UPS:
+            return None
+        cell = self.board.random_free_cell()
+        if cell < 0:
+            return None
+        serial = self.next_serial
+        self.next_serial += 1
+        self.place(cell, self.board.rng.choice(POWER_UP_TYPES), serial)
+        return cell, serial
+
+    def place(self, cell, power_up_type, serial=0):
+        self.items[cell] = (power_up_type, serial)
+        self.board.add_item(cell)
+
+    def collect(self, cell):
+        """
+        Take the power-up on a cell off the board. Returns its type, or None if there is none.
+        """
+        item = self.items.pop(cell, None)
+        if item is None:
+            return None
+        self.board.remove_item(cell)
+        return item[0]
+
+    def despawn(self, cell, serial):
+        item = self.items.get(cell)
+        if item is not None and item[1] == serial:
+            self.collect(cell)
+
+    def clear(self):
+        for cell in list(self.items):
+            self.collect(cell)
+
     def draw(self, screen):
-        if self.active:
-            color = self.get_power_up_color()
-            pygame.draw.rect(screen, color, (self.position[0], self.position[1], GRID_SIZE - 1, GRID_SIZE - 1))
-    
-    def get_power_up_color(self):
-        colors = {
-            'speed': BLUE,
-            'ghost': PURPLE,
-            'shrink': ORANGE,
-            'shield': CYAN
-        }
-        return colors.get(self.type, WHITE)
\ No newline at end of file
+        for cell in self.items:
+            self.draw_item(screen, cell)
+
+    def draw_item(self, screen, cell):
+        x, y = self.board.position(cell)
+        pygame.draw.rect(screen, POWER_UP_COLORS[self.items[cell][0]], (x, y, GRID_SIZE - 1, GRID_SIZE - 1))
@@ -0,0 +1,183 @@
+"""
+This module times the phases of each frame (input, simulation, each draw call, display flip and
+frame-rate wait) into fixed-size ring buffers, shows percentiles in an in-game overlay and exports
+Chrome trace-event JSON for chrome://tracing or Perfetto. Input latency, from a key press to the
+move it causes, is kept alongside and shown as one more row of the overlay.
+
+Timing is done with lap(): each call charges the time since the previous lap to the named phase.
+While the profiler is disabled every method returns immediately.
+"""
+
+import json
+import os
+import time
+from array import array
+import pygame
+from settings import *
+
+PHASES = (
+    "events", "move", "power_ups", "collision", "simulation",
+    "draw_snakes", "draw_food", "draw_power_up", "draw_obstacles", "draw_view", "draw_score",
+    "overlay", "flip", "tick_wait",
+)
+
+
+class FrameProfiler:
+    """
+    Per-frame phase timer. Keeps the per-phase totals of the last `frames` frames for statistics,
+    and the individual laps of those frames for trace export.
+    """
+    def __init__(self, frames=PROFILER_FRAMES, phases=PHASES):
+        self.enabled = False
+        self.show_overlay = False
+        self.phases = phases
+        self.phase_ids = {name: i for i, name in enumerate(phases)}
+        self.capacity = frames
+        # Per-frame totals, one ring buffer per phase plus the whole frame, in milliseconds
+        self.totals = [array('d', bytes(8 * frames)) for _ in phases]
+        self.frame_times = array('d', bytes(8 * frames))
+        self.frame_count = 0
+        # Key press to move latencies reported by the input queue, in milliseconds
+        self.input_latencies = array('d', bytes(8 * frames))
+        self.input_count = 0
+        # Individual laps for trace export: phase id, start and duration in seconds
+        self.lap_capacity = frames * len(phases) * 2
+        self.lap_phases = array('B', bytes(self.lap_capacity))
+        self.lap_starts = array('d', bytes(8 * self.lap_capacity))
+        self.lap_durations = array('d', bytes(8 * self.lap_capacity))
+        self.lap_count = 0
+        self.current = [0.0] * len(phases)
+        self.in_frame = False
+        self.frame_start = self.last = 0.0
+        self.overlay_lines = []
+        self.overlay_updated = 0.0
+
+    def begin_frame(self):
+        if not self.enabled:
+            return
+        self.frame_start = self.last = time.perf_counter()
+        self.current = [0.0] * len(self.phases)
+        self.in_frame = True
+
+    def lap(self, phase):
+        if not self.in_frame:
+            return
+        now = time.perf_counter()
+        phase_id = self.phase_ids[phase]
+        self.current[phase_id] += now - self.last
+        slot = self.lap_count % self.lap_capacity
+        self.lap_phases[slot] = phase_id
+        self.lap_starts[slot] = self.last
+        self.lap_durations[slot] = now - self.last
+        self.lap_count += 1
+        self.last = now
+
+    def end_frame(self):
+        if not self.in_frame:
+            return
+        self.in_frame = False
+        slot = self.frame_count % self.capacity
+        for phase_id, seconds in enumerate(self.current):
+            self.totals[phase_id][slot] = seconds * 1000
+        self.frame_times[slot] = (self.last - self.frame_start) * 1000
+        self.frame_count += 1
+
+    def record_input_latency(self, ms):
+        if not self.enabled:
+            return
+        self.input_latencies[self.input_count % self.capacity] = ms
+        self.input_count += 1
+
+    def toggle_overlay(self):
+        self.show_overlay = not self.show_overlay
+        if self.show_overlay:
+            self.enabled = True
+
+    def recent(self, samples, recorded=None):
+        """
+        Return the recorded part of a ring buffer, oldest first. recorded is the number of samples
+        ever written to it, the frame count by default.
+        """
+        recorded = self.frame_count if recorded is None else recorded
+        count = min(recorded, self.capacity)
+        start = recorded % self.capacity if recorded > self.capacity else 0
+        return [samples[(start + i) % self.capacity] for i in range(count)]
+
+    def percentiles(self, samples, points=(50, 99), recorded=None):
+        values = sorted(self.recent(samples, recorded))
+        if not values:
+            return [0.0] * len(points)
+        return [values[min(len(values) - 1, len(values) * p // 100)] for p in points]
+
+    def stats(self):
+        """
+        Return (phase, p50 ms, p99 ms) for every phase, followed by the whole frame and input latency.
+        """
+        rows = [(name, *self.percentiles(self.totals[i])) for i, name in enumerate(self.phases)]
+        rows.append(("frame", *self.percentiles(self.frame_times)))
+        rows.append(("input", *self.percentiles(self.input_latencies, recorded=self.input_count)))
+        return rows
+
+    def draw_overlay(self, screen, font):
+        """
+        Draw p50/p99 per phase and a graph of recent frame times in the top-right corner.
+        The text is refreshed twice a second so the overlay itself stays cheap.
+        """
+        now = time.perf_counter()
+        if now - self.overlay_updated > 0.5:
+            self.overlay_updated = now
+            rows = [("phase", "p50", "p99")]
+            rows += [(name, f"{p50:.2f}", f"{p99:.2f}") for name, p50, p99 in self.stats()]
+            self.overlay_lines = [[font.render(text, True, WHITE) for text in row] for row in rows]
+
+        column = max(line[0].get_width() for line in self.overlay_lines) + 10
+        number = max(cell.get_width() for line in self.overlay_lines for cell in line[1:]) + 10
+        graph_height = 60
+        width = column + 2 * number + 20
+        line_height = font.get_linesize()
+        height = line_height * len(self.overlay_lines) + graph_height + 30
+        panel = pygame.Rect(screen.get_width() - width - 10, 10, width, height)
+        screen.fill((20, 20, 20), panel)
+        pygame.draw.rect(screen, GRAY, panel, 1)
+        y = panel.top + 10
+        for name, p50, p99 in self.overlay_lines:
+            screen.blit(name, (panel.left + 10, y))
+            # Numbers are right-aligned in their columns
+            screen.blit(p50, (panel.left + 10 + column + number - p50.get_width(), y))
+            screen.blit(p99, (panel.left + 10 + column + 2 * number - p99.get_width(), y))
+            y += line_height
+
+        # Frame time graph, scaled so the top of the graph is two frames at DISPLAY_FPS
+        graph = pygame.Rect(panel.left + 10, y + 5, width - 20, graph_height)
+        pygame.draw.rect(screen, GRAY, graph, 1)
+        frame_times = self.recent(self.frame_times)[-graph.width:]
+        if len(frame_times) > 1:
+            scale = graph_height / (2000 / DISPLAY_FPS)
+            points = [(graph.left + i, graph.bottom - min(graph_height, ms * scale))
+                      for i, ms in enumerate(frame_times)]
+            pygame.draw.lines(screen, GREEN, False, points)
+        return panel
+
+    def export_trace(self, path):
+        """
+        Write the recorded laps as Chrome trace-event JSON and return the path.
+        """
+        count = min(self.lap_count, self.lap_capacity)
+        start = self.lap_count % self.lap_capacity if self.lap_count > self.lap_capacity else 0
+        events = []
+        for i in range(count):
+            slot = (start + i) % self.lap_capacity
+            events.append({
+                "name": self.phases[self.lap_phases[slot]],
+                "ph": "X",
+                "ts": self.lap_starts[slot] * 1e6,
+                "dur": self.lap_durations[slot] * 1e6,
+                "pid": os.getpid(),
+                "tid": 1,
+            })
+        directory = os.path.dirname(path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+        with open(path, "w") as f:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f)
+        return path
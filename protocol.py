@@ -0,0 +1,398 @@
+"""
+This module defines the binary messages exchanged by server.py and its clients.
+
+Every message is a 4-byte little-endian length followed by the payload, whose first byte is the
+message type. Numbers are varints as in replay files. Positions are sent as grid coordinates,
+zigzag-encoded so a head that has just left the board can still be described.
+
+The server sends a keyframe with the full state when a client joins and every NET_KEYFRAME_INTERVAL
+ticks; in between it only sends a delta for ticks where something changed: heads added and the
+number of tail cells removed per snake, power-up state changes, food moves, scores and events.
+A snake knocked out of an arena is only marked dead; its body is not sent again.
+Obstacles never change during a game, so they are rebuilt on the client from the game's seed.
+"""
+
+import struct
+from engine import Engine, DEATH_CAUSES
+from power_up import POWER_UP_TYPES
+from replay import DIRECTIONS, DIRECTION_CODES, write_varint, read_varint
+from settings import *
+
+LENGTH = struct.Struct("<I")
+JOIN, INPUT, WELCOME, KEYFRAME, DELTA, REFUSED = 1, 2, 10, 11, 12, 13
+# (dx, dy) of each direction code, in grid cells
+STEPS = ((0, -1), (0, 1), (-1, 0), (1, 0))
+
+# Bits of the per-snake state byte; the direction code sits in the top two bits
+GHOST, SHIELD, SPEED, SHRUNK, DEAD = 1, 2, 4, 8, 16
+# Bits saying which optional parts a delta carries
+FOOD_CHANGED, POWER_UP_CHANGED, SCORE_CHANGED = 1, 2, 4
+EVENTS = ("food", "power_up", "game_over", "death")
+
+
+def frame(payload):
+    return LENGTH.pack(len(payload)) + payload
+
+
+def write_signed(out, value):
+    write_varint(out, value << 1 if value >= 0 else (-value << 1) - 1)
+
+
+def read_signed(data, pos):
+    value, pos = read_varint(data, pos)
+    return (value >> 1) ^ -(value & 1), pos
+
+
+def write_text(out, text):
+    encoded = text.encode("utf-8")
+    write_varint(out, len(encoded))
+    out += encoded
+
+
+def read_text(data, pos):
+    length, pos = read_varint(data, pos)
+    return bytes(data[pos:pos + length]).decode("utf-8"), pos + length
+
+
+def encode_join(room, mode):
+    out = bytearray([JOIN])
+    write_text(out, room)
+    write_text(out, mode)
+    return frame(out)
+
+
+def encode_input(tick, direction):
+    out = bytearray([INPUT])
+    write_varint(out, tick)
+    out.append(DIRECTION_CODES[direction])
+    return frame(out)
+
+
+def encode_welcome(player_num, mode):
+    out = bytearray([WELCOME, player_num])
+    write_text(out, mode)
+    return frame(out)
+
+
+def encode_refused(reason):
+    out = bytearray([REFUSED])
+    write_text(out, reason)
+    return frame(out)
+
+
+def snake_state(snake):
+    return (GHOST * snake.ghost_mode | SHIELD * snake.shield_mode | SPEED * snake.speed_boost |
+            SHRUNK * snake.is_shrunk | DEAD * (not snake.alive) | DIRECTION_CODES[snake.direction] << 6)
+
+
+def apply_snake_state(snake, state):
+    if state & DEAD and snake.alive:
+        snake.alive = False
+        for segment in snake.body:
+            snake.board.remove_snake(snake.board.cell(segment))
+    snake.ghost_mode = bool(state & GHOST)
+    snake.shield_mode = bool(state & SHIELD)
+    snake.speed_boost = bool(state & SPEED)
+    snake.is_shrunk = bool(state & SHRUNK)
+    snake.direction = DIRECTIONS[state >> 6]
+
+
+def write_position(out, pos):
+    write_signed(out, pos[0] // GRID_SIZE)
+    write_signed(out, pos[1] // GRID_SIZE)
+
+
+def read_position(data, pos):
+    x, pos = read_signed(data, pos)
+    y, pos = read_signed(data, pos)
+    return (x * GRID_SIZE, y * GRID_SIZE), pos
+
+
+def write_item(out, engine):
+    """
+    Food cell + 1, 0 when there is none; then the power-ups on the board.
+    """
+    board = engine.board
+    write_varint(out, board.cell(engine.food.position) + 1 if engine.food.position is not None else 0)
+    write_power_ups(out, item_state(engine)[1])
+
+
+def write_power_ups(out, power_ups):
+    """
+    The number of power-ups, then the type and cell of each.
+    """
+    write_varint(out, len(power_ups))
+    for cell, power_up_type in power_ups:
+        out.append(POWER_UP_TYPES.index(power_up_type))
+        write_varint(out, cell)
+
+
+def read_power_ups(data, pos):
+    count, pos = read_varint(data, pos)
+    power_ups = []
+    for _ in range(count):
+        power_up_type = POWER_UP_TYPES[data[pos]]
+        cell, pos = read_varint(data, pos + 1)
+        power_ups.append((cell, power_up_type))
+    return power_ups, pos
+
+
+def item_state(engine):
+    board = engine.board
+    food = board.cell(engine.food.position) if engine.food.position is not None else -1
+    power_ups = tuple((cell, item[0]) for cell, item in engine.power_ups.items.items())
+    return food, power_ups
+
+
+def set_food(engine, cell):
+    board = engine.board
+    if engine.food.position is not None:
+        board.remove_item(board.cell(engine.food.position))
+    engine.food.position = board.position(cell) if cell >= 0 else None
+    if cell >= 0:
+        board.add_item(cell)
+
+
+def set_power_ups(engine, power_ups):
+    engine.power_ups.clear()
+    for cell, power_up_type in power_ups:
+        engine.power_ups.place(cell, power_up_type)
+
+
+def encode_keyframe(engine, started):
+    """
+    The whole dynamic state of a game. Bodies are sent as the head position followed by the
+    direction from each segment to the next, packed four to a byte.
+    """
+    board = engine.board
+    out = bytearray([KEYFRAME])
+    write_text(out, engine.game_mode)
+    write_varint(out, engine.players)
+    write_varint(out, engine.seed)
+    write_varint(out, board.columns)
+    write_varint(out, board.rows)
+    write_varint(out, engine.tick)
+    out.append(started | engine.game_over << 1)
+    out.append(DEATH_CAUSES.index(engine.death_cause) + 1 if engine.death_cause else 0)
+    out.append(engine.winner or 0)
+    for score in engine.score:
+        write_varint(out, score)
+    write_item(out, engine)
+    for snake in engine.snakes:
+        out.append(snake_state(snake))
+        if not snake.alive:
+            continue
+        write_varint(out, len(snake.body))
+        write_position(out, snake.body[0])
+        packed = 0
+        count = 0
+        previous = snake.body[0]
+        for segment in list(snake.body)[1:]:
+            dx = (segment[0] - previous[0]) // GRID_SIZE
+            dy = (segment[1] - previous[1]) // GRID_SIZE
+            # A step of more than one cell is a ghost-mode wrap around the board
+            if abs(dx) > 1:
+                dx = -1 if dx > 0 else 1
+            if abs(dy) > 1:
+                dy = -1 if dy > 0 else 1
+            packed |= STEPS.index((dx, dy)) << (2 * count)
+            count += 1
+            if count == 4:
+                out.append(packed)
+                packed = count = 0
+            previous = segment
+        if count:
+            out.append(packed)
+    return frame(out)
+
+
+def apply_keyframe(data, engine=None):
+    """
+    Bring a client's copy of the game in line with a keyframe, building a new one when the keyframe
+    is for a different game. Returns (engine, started).
+    """
+    pos = 1
+    mode, pos = read_text(data, pos)
+    players, pos = read_varint(data, pos)
+    seed, pos = read_varint(data, pos)
+    columns, pos = read_varint(data, pos)
+    rows, pos = read_varint(data, pos)
+    tick, pos = read_varint(data, pos)
+    game = (seed, mode, players, columns, rows)
+    if engine is None or (engine.seed, engine.game_mode, engine.players, engine.columns, engine.rows) != game:
+        engine = Engine(mode, seed=seed, columns=columns, rows=rows, players=players)
+    board = engine.board
+    engine.tick = tick
+    flags = data[pos]
+    cause = data[pos + 1]
+    winner = data[pos + 2]
+    pos += 3
+    started = bool(flags & 1)
+    engine.game_over = bool(flags & 2)
+    engine.death_cause = DEATH_CAUSES[cause - 1] if cause else None
+    engine.board_full = engine.death_cause == "board_full"
+    engine.winner = winner if engine.game_over else None
+    for i in range(len(engine.score)):
+        engine.score[i], pos = read_varint(data, pos)
+
+    food, pos = read_varint(data, pos)
+    set_food(engine, food - 1)
+    power_ups, pos = read_power_ups(data, pos)
+    set_power_ups(engine, power_ups)
+
+    for snake in engine.snakes:
+        apply_snake_state(snake, data[pos])
+        pos += 1
+        if not snake.alive:
+            continue
+        length, pos = read_varint(data, pos)
+        head, pos = read_position(data, pos)
+        for segment in snake.body:
+            board.remove_snake(board.cell(segment))
+        body = [head]
+        x, y = head
+        for i in range(length - 1):
+            dx, dy = STEPS[data[pos + i // 4] >> (2 * (i % 4)) & 3]
+            x, y = (x + dx * GRID_SIZE) % board.width, (y + dy * GRID_SIZE) % board.height
+            body.append((x, y))
+        pos += (length + 2) // 4
+        snake.body.clear()
+        snake.body.extend(body)
+        for segment in body:
+            board.add_snake(board.cell(segment), snake.player_number)
+        snake.head_cell = board.cell(head)
+        snake.previous_head = head
+    return engine, started
+
+
+class DeltaEncoder:
+    """
+    Remembers what clients were last told about a game, to send only what changed.
+    """
+    def __init__(self, engine):
+        self.reset(engine)
+
+    def reset(self, engine):
+        self.engine = engine
+        self.heads = [snake.body[0] for snake in engine.snakes]
+        self.lengths = [len(snake.body) for snake in engine.snakes]
+        self.states = [snake_state(snake) for snake in engine.snakes]
+        self.items = item_state(engine)
+        self.score = list(engine.score)
+
+    def encode(self, events):
+        """
+        Return a delta message for the last tick, or None if nothing visible changed.
+        """
+        engine = self.engine
+        snakes = []
+        for i, snake in enumerate(engine.snakes):
+            head, length, state = snake.body[0], len(snake.body), snake_state(snake)
+            moved = head is not self.heads[i]  # every move puts a new tuple at the head
+            removed = self.lengths[i] + moved - length
+            if moved or removed or state != self.states[i]:
+                snakes.append((i, moved, head, removed, state))
+            self.heads[i], self.lengths[i], self.states[i] = head, length, state
+
+        changed = 0
+        items = item_state(engine)
+        if items[0] != self.items[0]:
+            changed |= FOOD_CHANGED
+        if items[1] != self.items[1]:
+            changed |= POWER_UP_CHANGED
+        if engine.score != self.score:
+            changed |= SCORE_CHANGED
+            self.score = list(engine.score)
+        self.items = items
+        if not (snakes or changed or events):
+            return None
+
+        out = bytearray([DELTA])
+        write_varint(out, engine.tick)
+        out.append(changed)
+        write_varint(out, len(snakes))
+        for i, moved, head, removed, state in snakes:
+            write_varint(out, i << 1 | moved)
+            out.append(state)
+            if moved:
+                write_position(out, head)
+            write_varint(out, removed)
+        if changed & FOOD_CHANGED:
+            write_varint(out, items[0] + 1)
+        if changed & POWER_UP_CHANGED:
+            write_power_ups(out, items[1])
+        if changed & SCORE_CHANGED:
+            for score in engine.score:
+                write_varint(out, score)
+        write_varint(out, len(events))
+        for event in events:
+            out.append(EVENTS.index(event[0]))
+            out.append(event[1])
+            if event[0] == "power_up":
+                out.append(POWER_UP_TYPES.index(event[2]))
+            elif event[0] == "death":
+                out.append(DEATH_CAUSES.index(event[2]))
+            elif event[0] == "game_over":
+                out.append(DEATH_CAUSES.index(event[2]))
+                out.append(engine.winner)
+        return frame(out)
+
+
+def apply_delta(data, engine):
+    """
+    Apply a delta to a client's copy of the game and return the events it carried.
+    """
+    board = engine.board
+    pos = 1
+    engine.tick, pos = read_varint(data, pos)
+    changed = data[pos]
+    count, pos = read_varint(data, pos + 1)
+    for _ in range(count):
+        index, pos = read_varint(data, pos)
+        snake = engine.snakes[index >> 1]
+        moved = index & 1
+        state = data[pos]
+        pos += 1
+        if moved:
+            head, pos = read_position(data, pos)
+            snake.previous_head = snake.body[0]
+            snake.body.appendleft(head)
+            snake.head_cell = board.cell(head)
+            board.add_snake(snake.head_cell, snake.player_number)
+        removed, pos = read_varint(data, pos)
+        for _ in range(removed):
+            board.remove_snake(board.cell(snake.body.pop()))
+        # After the move, so a snake that died on it leaves the board with its final body
+        apply_snake_state(snake, state)
+    if changed & FOOD_CHANGED:
+        food, pos = read_varint(data, pos)
+        set_food(engine, food - 1)
+    if changed & POWER_UP_CHANGED:
+        power_ups, pos = read_power_ups(data, pos)
+        set_power_ups(engine, power_ups)
+    if changed & SCORE_CHANGED:
+        for i in range(len(engine.score)):
+            engine.score[i], pos = read_varint(data, pos)
+
+    events = []
+    count, pos = read_varint(data, pos)
+    for _ in range(count):
+        kind, player_num = data[pos], data[pos + 1]
+        pos += 2
+        if kind == 0:
+            events.append(("food", player_num))
+        elif kind == 1:
+            events.append(("power_up", player_num, POWER_UP_TYPES[data[pos]]))
+            pos += 1
+        elif kind == 3:
+            events.append(("death", player_num, DEATH_CAUSES[data[pos]]))
+            pos += 1
+        else:
+            cause = DEATH_CAUSES[data[pos]]
+            engine.winner = data[pos + 1]
+            pos += 2
+            events.append(("game_over", player_num, cause))
+            engine.game_over = True
+            engine.death_cause = cause
+            engine.board_full = cause == "board_full"
+    return events
@@ -0,0 +1,103 @@
+import pygame
+from settings import *
+
+
+class DirtyRenderer:
+    """
+    Draws the playing field by repainting only the cells that changed since the last frame,
+    and returns the screen rects that need to be pushed with pygame.display.update().
+    Anything that changes the look of a whole snake (power-up state) falls back to a full redraw.
+    """
+    def __init__(self, game):
+        self.game = game
+        self.board = None
+        self.invalidate()
+
+    def invalidate(self):
+        """
+        Force the next frame to be a full redraw, e.g. after the screen was drawn over.
+        """
+        self.full_redraw = True
+
+    def cell_rect(self, cell):
+        x, y = self.board.position(cell)
+        return pygame.Rect(x, y, GRID_SIZE, GRID_SIZE)
+
+    def cells_under(self, rect):
+        board = self.board
+        first_col = max(0, rect.left // GRID_SIZE)
+        last_col = min(board.columns - 1, (rect.right - 1) // GRID_SIZE)
+        first_row = max(0, rect.top // GRID_SIZE)
+        last_row = min(board.rows - 1, (rect.bottom - 1) // GRID_SIZE)
+        for row in range(first_row, last_row + 1):
+            for col in range(first_col, last_col + 1):
+                yield row * board.columns + col
+
+    def draw_cell(self, screen, cell, snakes):
+        engine = self.game.engine
+        board = self.board
+        rect = self.cell_rect(cell)
+        screen.fill(BLACK, rect)
+        pos = rect.topleft
+
+        # Same stacking order as a full redraw: snakes, food, power-up, obstacles
+        if board.snake_cells[cell]:
+            snake = snakes.get(board.owner[cell])
+            if snake is not None:
+                is_head = cell == snake.head_cell
+                snake.draw_segment(screen, pos, is_head)
+        if engine.food.position == pos:
+            engine.food.draw(screen)
+        if cell in engine.power_ups.items:
+            engine.power_ups.draw_item(screen, cell)
+        if board.obstacle_cells[cell]:
+            pygame.draw.rect(screen, YELLOW, (pos[0], pos[1], GRID_SIZE - 1, GRID_SIZE - 1))
+        return rect
+
+    def draw(self):
+        game = self.game
+        engine = game.engine
+        screen = game.screen
+        snakes = {snake.player_number: snake for snake in engine.snakes if snake.alive}
+        looks = tuple((s.ghost_mode, s.speed_boost, s.shield_mode, s.is_shrunk) for s in engine.snakes)
+        hud_key = (tuple(engine.score), looks, len(snakes))
+
+        if self.board is not engine.board or looks != self.looks:
+            self.full_redraw = True
+
+        if self.full_redraw:
+            if self.board is not None:
+                self.board.dirty = None
+            self.board = engine.board
+            self.board.dirty = set()
+            game.draw_game()
+            self.hud_rects = game.draw_score()
+            self.hud_key = hud_key
+            self.looks = looks
+            self.heads = [snake.head_cell for snake in engine.snakes]
+            self.full_redraw = False
+            return [screen.get_rect()]
+
+        # Cells the board saw change, plus old and new heads whose colour differs from the body
+        dirty = self.board.dirty
+        heads = [snake.head_cell for snake in engine.snakes]
+        dirty.update(cell for cell in self.heads + heads if cell >= 0)
+        self.heads = heads
+
+        # The HUD sits on top of the board; redraw it and the cells beneath it together
+        hud_area = self.hud_rects
+        redraw_hud = hud_key != self.hud_key or \
+            any(self.cell_rect(cell).collidelist(hud_area) >= 0 for cell in dirty)
+        if redraw_hud:
+            for rect in hud_area:
+                dirty.update(self.cells_under(rect))
+
+        rects = [self.draw_cell(screen, cell, snakes) for cell in dirty]
+        dirty.clear()
+
+        if redraw_hud:
+            self.hud_rects = game.draw_score()
+            self.hud_key = hud_key
+            rects.extend(hud_area)
+            rects.extend(self.hud_rects)
+        return rects
@@ -0,0 +1,174 @@
+"""
+This module records games as compact binary replays and plays them back headlessly.
+
+A replay is a header holding the seed and the settings that shape the simulation, followed by
+run-length encoded inputs: each record is the number of ticks since the previous record and the
+(player, direction) that was pressed, both as varints. Since the engine is deterministic for a
+given seed, re-applying the inputs on the same ticks reproduces the game exactly.
+"""
+
+import os
+import struct
+import sys
+import time
+from engine import Engine
+from state import GameState
+from settings import *
+
+MAGIC = b"SNKR"
+VERSION = 3  # version 2 added the number of players after the mode; 3 came with scheduled power-ups
+HEADER = struct.Struct("<IHHHHHB")  # seed, columns, rows, tick rate, game speed, obstacles, spacing
+DIRECTIONS = ("UP", "DOWN", "LEFT", "RIGHT")
+DIRECTION_CODES = {direction: code for code, direction in enumerate(DIRECTIONS)}
+END = 0  # action code for "end of replay"; real codes start at player 1
+
+
+def write_varint(out, value):
+    while value >= 0x80:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def read_varint(data, pos):
+    value = shift = 0
+    while True:
+        byte = data[pos]
+        pos += 1
+        value |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return value, pos
+        shift += 7
+
+
+def simulation_settings(engine):
+    board = engine.board
+    return (engine.seed, board.columns, board.rows, SIM_TICK_RATE, GAME_SPEED,
+            OBSTACLE_COUNT, MIN_OBSTACLE_SPACING)
+
+
+class ReplayRecorder:
+    """
+    Collects the inputs of one game. Call record() with the engine tick before each step.
+    """
+    def __init__(self, engine):
+        mode = engine.game_mode.encode("ascii")
+        self.data = bytearray(MAGIC)
+        self.data.append(VERSION)
+        self.data.append(len(mode))
+        self.data += mode
+        write_varint(self.data, engine.players)
+        self.data += HEADER.pack(*simulation_settings(engine))
+        self.last_tick = 0
+
+    def record(self, tick, actions):
+        for player_num, direction in actions or ():
+            write_varint(self.data, tick - self.last_tick)
+            write_varint(self.data, player_num << 2 | DIRECTION_CODES[direction])
+            self.last_tick = tick
+
+    def finish(self, final_tick):
+        """
+        Return the complete replay, ending at final_tick.
+        """
+        data = bytearray(self.data)
+        write_varint(data, final_tick - self.last_tick)
+        write_varint(data, END)
+        return bytes(data)
+
+    def save(self, path, final_tick):
+        directory = os.path.dirname(path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+        with open(path, "wb") as f:
+            f.write(self.finish(final_tick))
+
+
+class ReplayPlayer:
+    """
+    Re-simulates a replay headlessly. Keyframes of the engine are kept every
+    keyframe_interval ticks as the replay is played, so seek() only has to simulate
+    forward from the nearest one.
+    """
+    def __init__(self, data, keyframe_interval=REPLAY_KEYFRAME_INTERVAL):
+        if data[:4] != MAGIC:
+            raise ValueError("not a replay file")
+        if data[4] != VERSION:
+            # Earlier versions played power-ups by different rules and would not replay the same
+            raise ValueError(f"unsupported replay version {data[4]}")
+        mode_length = data[5]
+        self.game_mode = data[6:6 + mode_length].decode("ascii")
+        pos = 6 + mode_length
+        players, pos = read_varint(data, pos)
+        settings = HEADER.unpack_from(data, pos)
+        pos += HEADER.size
+        self.seed = settings[0]
+
+        self.actions = {}  # tick -> [(player, direction)]
+        tick = 0
+        while True:
+            delta, pos = read_varint(data, pos)
+            code, pos = read_varint(data, pos)
+            tick += delta
+            if code == END:
+                break
+            self.actions.setdefault(tick, []).append((code >> 2, DIRECTIONS[code & 3]))
+        self.final_tick = tick
+
+        self.engine = Engine(self.game_mode, seed=self.seed, columns=settings[1], rows=settings[2], players=players)
+        if simulation_settings(self.engine) != settings:
+            raise ValueError("replay was recorded with different game settings")
+        self.keyframe_interval = keyframe_interval
+        self.keyframes = {0: GameState.capture(self.engine)}
+
+    @classmethod
+    def load(cls, path, **kwargs):
+        with open(path, "rb") as f:
+            return cls(f.read(), **kwargs)
+
+    @property
+    def finished(self):
+        return self.engine.game_over or self.engine.tick >= self.final_tick
+
+    def step(self):
+        events = self.engine.step(self.actions.get(self.engine.tick))
+        tick = self.engine.tick
+        if tick % self.keyframe_interval == 0 and tick not in self.keyframes:
+            self.keyframes[tick] = GameState.capture(self.engine)
+        return events
+
+    def run(self):
+        """
+        Play to the end of the replay as fast as possible and return the engine.
+        """
+        while not self.finished:
+            self.step()
+        return self.engine
+
+    def seek(self, tick):
+        """
+        Move to the given tick, restoring the nearest earlier keyframe if needed.
+        """
+        tick = max(0, min(tick, self.final_tick))
+        keyframe = max(k for k in self.keyframes if k <= tick)
+        if not keyframe <= self.engine.tick <= tick:
+            self.keyframes[keyframe].load(self.engine)
+        while self.engine.tick < tick and not self.engine.game_over:
+            self.step()
+        return self.engine
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print("usage: python replay.py REPLAY [SEEK_TICK]")
+        sys.exit(1)
+    player = ReplayPlayer.load(sys.argv[1])
+    start = time.perf_counter()
+    if len(sys.argv) > 2:
+        engine = player.seek(int(sys.argv[2]))
+    else:
+        engine = player.run()
+    elapsed = time.perf_counter() - start
+    print(f"mode {player.game_mode}, seed {player.seed}: tick {engine.tick}/{player.final_tick}, "
+          f"score {engine.score}, game over: {engine.game_over}")
+    print(f"simulated {engine.tick} ticks in {elapsed:.3f}s")
@@ -0,0 +1,37 @@
+"""
+This module keeps the engine's timers: power-up spawns, despawns and effects running out.
+
+Timers are entries in a heap, ordered by the simulation tick they fire on and then by the order
+they were scheduled in, so a game fires them in the same order every time it is replayed. Nothing
+is polled: a tick with no timer due costs one comparison against the top of the heap.
+
+Entries are plain tuples (tick, seq, kind, payload), where payload is a tuple of small integers,
+so the whole queue can be copied or packed into a snapshot as it is.
+"""
+
+import heapq
+
+
+class Scheduler:
+    def __init__(self):
+        self.heap = []
+        self.seq = 0  # scheduling order, to break ties between timers on the same tick
+
+    def __len__(self):
+        return len(self.heap)
+
+    def schedule(self, tick, kind, payload=()):
+        heapq.heappush(self.heap, (tick, self.seq, kind, payload))
+        self.seq += 1
+
+    def pop_due(self, tick):
+        """
+        Remove and return the (kind, payload) of every timer due on or before tick, in firing order.
+        Timers scheduled while handling these only fire on a later call.
+        """
+        heap = self.heap
+        due = []
+        while heap and heap[0][0] <= tick:
+            _, _, kind, payload = heapq.heappop(heap)
+            due.append((kind, payload))
+        return due
@@ -0,0 +1,256 @@
+"""
+This module runs games for networked clients. The server owns the simulation: clients only send
+their turns, tagged with the tick they are meant for, and draw the state the server sends back
+(see protocol.py).
+
+    python server.py                      # listen on SERVER_PORT
+    python server.py --port 6000
+    python server.py --measure            # how many rooms one core can keep up with
+    python game.py --connect localhost    # join from the game; --room picks a room
+
+Clients join a named room, which is created with the mode the first client asks for. A room starts
+once it has a player for every snake (two in 2P, ARENA_PLAYERS in an arena); when a game ends the room starts a new one after a short delay.
+"""
+
+import argparse
+import asyncio
+import random
+import time
+from engine import Engine, TICK_MS
+from input_queue import InputQueue
+from protocol import (JOIN, INPUT, DIRECTIONS, LENGTH, DeltaEncoder, encode_keyframe, encode_refused,
+                      encode_welcome, read_text, read_varint)
+from settings import *
+
+MAX_MESSAGE = 1024  # longest message a client may send
+
+
+class Room:
+    """
+    One game and the clients playing it. send is called with (player, message bytes) for every
+    message the room produces, so rooms can be run without sockets.
+    """
+    def __init__(self, name, mode, send):
+        self.name = name
+        self.mode = mode
+        self.send = send
+        self.players = set()
+        self.inputs = {}  # tick -> [(player, direction)]
+        self.new_game()
+
+    @property
+    def capacity(self):
+        return self.engine.players
+
+    @property
+    def started(self):
+        return len(self.players) == self.capacity
+
+    def new_game(self):
+        self.engine = Engine(self.mode)
+        self.encoder = DeltaEncoder(self.engine)
+        self.turns = InputQueue(self.engine)  # turns that are due, waiting for their snake to move
+        self.inputs.clear()
+        self.restart_in = None
+
+    def free_player(self):
+        """
+        Return the lowest player number nobody has taken, or None if the room is full.
+        """
+        for player_num in range(1, self.capacity + 1):
+            if player_num not in self.players:
+                return player_num
+        return None
+
+    def join(self, player_num):
+        self.players.add(player_num)
+        if self.started:
+            # Everyone starts from the same fresh game
+            self.new_game()
+            self.broadcast(encode_keyframe(self.engine, True))
+        else:
+            self.send(player_num, encode_keyframe(self.engine, False))
+
+    def leave(self, player_num):
+        self.players.discard(player_num)
+        if self.players:
+            self.new_game()
+            self.broadcast(encode_keyframe(self.engine, False))
+
+    def queue_input(self, player_num, tick, direction):
+        """
+        Schedule a turn for the tick it was tagged with. Late inputs are queued on the next tick,
+        and ones tagged too far ahead are pulled in.
+        """
+        now = self.engine.tick
+        tick = max(now, min(tick, now + NET_MAX_INPUT_LEAD))
+        self.inputs.setdefault(tick, []).append((player_num, direction))
+
+    def broadcast(self, message):
+        for player_num in self.players:
+            self.send(player_num, message)
+
+    def tick(self):
+        if not self.started:
+            return
+        engine = self.engine
+        if engine.game_over:
+            self.restart_in -= 1
+            if self.restart_in <= 0:
+                self.new_game()
+                self.broadcast(encode_keyframe(self.engine, True))
+            return
+
+        for player_num, direction in self.inputs.pop(engine.tick, ()):
+            self.turns.push(player_num, direction)
+        events = engine.step(self.turns.actions())
+        if engine.game_over:
+            self.restart_in = NET_RESTART_DELAY
+        if engine.tick % NET_KEYFRAME_INTERVAL == 0:
+            self.encoder.reset(engine)
+            message = encode_keyframe(engine, True)
+            if events:
+                # Events still need to reach the clients
+                message += self.encoder.encode(events) or b""
+        else:
+            message = self.encoder.encode(events)
+        if message:
+            self.broadcast(message)
+
+
+class Server:
+    def __init__(self):
+        self.rooms = {}
+        self.writers = {}  # (room name, player) -> StreamWriter
+
+    def send(self, name, player_num, message):
+        writer = self.writers.get((name, player_num))
+        if writer is None or writer.is_closing():
+            return
+        if writer.transport.get_write_buffer_size() > NET_MAX_BUFFERED:
+            # The client isn't reading; drop it rather than queue without bound
+            writer.close()
+            return
+        writer.write(message)
+
+    async def handle_client(self, reader, writer):
+        room = player_num = None
+        try:
+            message = await read_message(reader)
+            if message[0] != JOIN:
+                return
+            name, pos = read_text(message, 1)
+            mode, pos = read_text(message, pos)
+            if mode not in ("1P", "2P", "ARENA"):
+                writer.write(encode_refused(f"unknown mode {mode}"))
+                return
+            room = self.rooms.get(name)
+            if room is None:
+                room = self.rooms[name] = Room(name, mode, lambda p, m: self.send(name, p, m))
+            elif room.mode != mode:
+                writer.write(encode_refused(f"room {name} is playing {room.mode}"))
+                return
+
+            free = room.free_player()
+            if free is None:
+                writer.write(encode_refused(f"room {name} is full"))
+                return
+            player_num = free
+            self.writers[(name, player_num)] = writer
+            writer.write(encode_welcome(player_num, room.mode))
+            room.join(player_num)
+
+            while True:
+                message = await read_message(reader)
+                if message[0] == INPUT:
+                    tick, pos = read_varint(message, 1)
+                    room.queue_input(player_num, tick, DIRECTIONS[message[pos] & 3])
+        except (asyncio.IncompleteReadError, ConnectionError, ValueError, IndexError):
+            pass
+        finally:
+            if player_num is not None:
+                self.writers.pop((room.name, player_num), None)
+                room.leave(player_num)
+                if not room.players:
+                    del self.rooms[room.name]
+            writer.close()
+
+    async def run_ticks(self):
+        """
+        Step every room at SIM_TICK_RATE, catching up on missed ticks after a stall.
+        """
+        loop = asyncio.get_running_loop()
+        next_tick = loop.time()
+        while True:
+            for room in list(self.rooms.values()):
+                room.tick()
+            next_tick += TICK_MS / 1000
+            delay = next_tick - loop.time()
+            if delay < -MAX_TICKS_PER_FRAME * TICK_MS / 1000:
+                next_tick = loop.time()  # too far behind; don't try to catch up all at once
+            await asyncio.sleep(max(0.0, delay))
+
+    async def serve(self, host, port):
+        server = await asyncio.start_server(self.handle_client, host, port)
+        print(f"Listening on {', '.join(str(s.getsockname()) for s in server.sockets)}")
+        async with server:
+            await asyncio.gather(server.serve_forever(), self.run_ticks())
+
+
+async def read_message(reader):
+    (length,) = LENGTH.unpack(await reader.readexactly(LENGTH.size))
+    if not 0 < length <= MAX_MESSAGE:
+        raise ValueError("bad message length")
+    return await reader.readexactly(length)
+
+
+def measure(seconds=2.0, mode="2P"):
+    """
+    Estimate how many rooms one core can tick in real time: run rooms of random players without
+    sockets, counting the bytes they would send, and time the average cost of a room tick.
+    """
+    sent = [0]
+
+    def send(player_num, message):
+        sent[0] += len(message)
+
+    rng = random.Random(0)
+    rooms = [Room(str(i), mode, send) for i in range(100)]
+    for room in rooms:
+        for player_num in range(1, room.capacity + 1):
+            room.join(player_num)
+    sent[0] = 0
+    ticks = 0
+    start = time.perf_counter()
+    while time.perf_counter() - start < seconds:
+        for room in rooms:
+            if rng.random() < 0.05:
+                room.queue_input(rng.randint(1, room.capacity), room.engine.tick, rng.choice(DIRECTIONS))
+            room.tick()
+            if room.engine.game_over:
+                room.restart_in = 1  # random players die fast; keep the rooms busy playing
+        ticks += 1
+    elapsed = time.perf_counter() - start
+    room_tick = elapsed / (ticks * len(rooms))
+    rooms_per_core = int(TICK_MS / 1000 / room_tick)
+    bandwidth = sent[0] / len(rooms) / (ticks * TICK_MS / 1000)
+    print(f"{mode}: {room_tick * 1e6:.1f} us per room tick -> about {rooms_per_core} rooms per core "
+          f"at {SIM_TICK_RATE} ticks/s; {bandwidth:.0f} bytes/s sent per room at full speed")
+    return rooms_per_core
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Snake game server")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=SERVER_PORT)
+    parser.add_argument("--measure", action="store_true", help="estimate how many rooms one core can host")
+    args = parser.parse_args()
+    if args.measure:
+        measure(mode="1P")
+        measure(mode="2P")
+        measure(mode="ARENA")
+    else:
+        try:
+            asyncio.run(Server().serve(args.host, args.port))
+        except KeyboardInterrupt:
+            pass
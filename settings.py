@@ -4,7 +4,12 @@ import pygame
 WINDOW_WIDTH = 800
 WINDOW_HEIGHT = 600
 GRID_SIZE = 20
-GAME_SPEED = 10
+GAME_SPEED = 10  # Snake moves per second at normal speed
+SIM_TICK_RATE = 60  # Simulation ticks per second; a multiple of GAME_SPEED
+DISPLAY_FPS = 60  # Render and input polling rate, independent of the simulation
+MAX_TICKS_PER_FRAME = 10  # Simulation catch-up limit after a slow frame
+INTERPOLATE_MOVEMENT = True  # Slide snake heads between cells when rendering faster than they move
+DIRTY_RECT_RENDERING = False  # Only push changed cells to the display instead of flipping every frame (no interpolation)
 
 # Colors
 BLACK = (0, 0, 0)
@@ -17,13 +22,37 @@ PURPLE = (128, 0, 128)
 ORANGE = (255, 165, 0)
 CYAN = (0, 255, 255)
 GRAY = (128, 128, 128)
+# Body colors of players 1, 2, 3...; repeats for larger arenas
+PLAYER_COLORS = [GREEN, RED, BLUE, ORANGE, CYAN, WHITE, (255, 105, 180), (139, 69, 19)]
 
 # Power-up settings
 SPEED_BOOST_DURATION = 5000  # 5 seconds
 GHOST_MODE_DURATION = 3000   # 3 seconds
 SHRINK_DURATION = 4000      # 4 seconds
 SHIELD_DURATION = 6000      # 6 seconds
-POWER_UP_SPAWN_CHANCE = 0.02  # 2% chance per frame
+POWER_UP_SPAWN_CHANCE = 0.02  # 2% chance per move, on average, of a new power-up appearing
+MAX_POWER_UPS = 3             # Power-ups on the board at once
+POWER_UP_LIFETIME = 15000     # 15 seconds before an uncollected power-up disappears
+
+# Replay settings
+RECORD_REPLAYS = True  # Save a replay of every game to REPLAY_DIR
+REPLAY_DIR = "replays"
+REPLAY_KEYFRAME_INTERVAL = 600  # Ticks between keyframes kept for seeking
+
+# Save settings
+AUTOSAVE_PATH = "saves/autosave.snap"  # Game in progress, offered as "Continue" on the menu
+AUTOSAVE_INTERVAL = 300  # Ticks between autosaves; pausing and closing the window save too
+AUTOSAVE_MAX_CELLS = 100_000  # Larger boards take milliseconds to capture, so only save when paused or closed
+
+# Network settings
+SERVER_PORT = 5555
+NET_KEYFRAME_INTERVAL = 120  # Ticks between full-state keyframes sent to clients for resync
+NET_MAX_INPUT_LEAD = 30      # Inputs tagged further ahead than this many ticks are applied early
+NET_RESTART_DELAY = 180      # Ticks a finished game stays on screen before the room starts a new one
+NET_MAX_BUFFERED = 1 << 20   # Bytes queued for a client before it is dropped as too slow
+
+# Arena settings
+ARENA_PLAYERS = 8  # Snakes in an arena game; every one but player 1 is on autopilot when played locally
 
 # Obstacle settings
 OBSTACLE_COUNT = 15  # Increased number of obstacles
@@ -44,6 +73,21 @@ EFFECT_VOLUME = 0.4
 MENU_BUTTON_WIDTH = 200
 MENU_BUTTON_HEIGHT = 50
 MENU_BUTTON_PADDING = 20
+IDLE_WAIT_MS = 1000  # Longest the menu and game-over screens sleep waiting for input
+TEXT_CACHE_SIZE = 64  # Rendered text surfaces kept by the text cache
+
+# Profiler settings
+PROFILER_FRAMES = 600  # Frames of phase timings kept for the overlay and trace export
+PROFILE_DIR = "profiles"
+
+# Video export settings
+VIDEO_BUFFER_FRAMES = 8  # Captured frames that can wait for the writer thread before capturing waits or drops
+
+# Autopilot settings
+AUTOPILOT_BUDGET = 1500  # Cells a snake's autopilot may expand per decision
+
+# Input settings
+INPUT_QUEUE_SIZE = 3  # Turns a player can queue ahead of their snake's next moves
 
 # Player controls
 P1_CONTROLS = {
@@ -1,32 +1,59 @@
-import pygame
+from collections import deque
+from itertools import repeat
+from board import Board
+from sprites import get_atlas
 from settings import *
 
+# Effect lengths in simulation ticks
+EFFECT_TICKS = {
+    'speed': SPEED_BOOST_DURATION * SIM_TICK_RATE // 1000,
+    'ghost': GHOST_MODE_DURATION * SIM_TICK_RATE // 1000,
+    'shrink': SHRINK_DURATION * SIM_TICK_RATE // 1000,
+    'shield': SHIELD_DURATION * SIM_TICK_RATE // 1000,
+}
+
 class Snake:
-    def __init__(self, player_number=1):
+    def __init__(self, player_number=1, board=None, start=None):
         self.player_number = player_number
+        self.board = board if board is not None else Board()
+        self.start = start  # (position, direction), or None for the player's usual spot
+        self.body = deque()
         self.reset()
         
     def reset(self):
+        for segment in self.body:
+            self.board.remove_snake(self.board.cell(segment))
+            
         # Different starting positions for different players
-        if self.player_number == 1:
-            self.body = [(WINDOW_WIDTH // 4, WINDOW_HEIGHT // 2)]
+        columns, rows = self.board.columns, self.board.rows
+        if self.start is not None:
+            position, self.direction = self.start
+            self.body = deque([position])
+        elif self.player_number == 1:
+            self.body = deque([(columns // 4 * GRID_SIZE, rows // 2 * GRID_SIZE)])
             self.direction = "RIGHT"
         else:
-            self.body = [(3 * WINDOW_WIDTH // 4, WINDOW_HEIGHT // 2)]
+            self.body = deque([(3 * columns // 4 * GRID_SIZE, rows // 2 * GRID_SIZE)])
             self.direction = "LEFT"
+        self.head_cell = self.board.cell(self.body[0])
+        self.board.add_snake(self.head_cell, self.player_number)
+        self.previous_head = self.body[0]
+        self.move_countdown = 1
+        self.alive = True
             
         self.grow_pending = False
         self.speed_boost = False
         self.ghost_mode = False
         self.shield_mode = False
         self.is_shrunk = False
-        self.speed_boost_time = 0
-        self.ghost_mode_time = 0
-        self.shield_mode_time = 0
-        self.shrink_time = 0
+        # Simulation ticks the effects run out on
+        self.speed_boost_until = 0
+        self.ghost_mode_until = 0
+        self.shield_mode_until = 0
+        self.shrink_until = 0
         
     def move(self):
-        x, y = self.body[0]
+        x, y = self.previous_head = self.body[0]
         
         if self.direction == "UP":
             y -= GRID_SIZE
@@ -39,64 +66,83 @@ class Snake:
             
         # Wrap around screen if in ghost mode
         if self.ghost_mode:
-            x = x % WINDOW_WIDTH
-            y = y % WINDOW_HEIGHT
+            x = x % self.board.width
+            y = y % self.board.height
             
         new_head = (x, y)
         
         if not self.grow_pending:
-            self.body.pop()
+            self.board.remove_snake(self.board.cell(self.body.pop()))
         else:
             self.grow_pending = False
             
-        self.body.insert(0, new_head)
+        self.body.appendleft(new_head)
+        self.head_cell = self.board.cell(new_head)
+        self.board.add_snake(self.head_cell, self.player_number)
         
     def grow(self):
         if not self.is_shrunk:
             self.grow_pending = True
         
-    def activate_power_up(self, power_up_type, current_time):
+    def activate_power_up(self, power_up_type, tick):
+        """
+        Start an effect on the given simulation tick, or extend it if it is already running, and
+        return the tick it now runs out on. The engine schedules a call to expire_power_up() for then.
+        """
         if power_up_type == 'speed':
             self.speed_boost = True
-            self.speed_boost_time = current_time + SPEED_BOOST_DURATION
+            self.speed_boost_until = max(self.speed_boost_until, tick) + EFFECT_TICKS['speed']
+            return self.speed_boost_until
         elif power_up_type == 'ghost':
             self.ghost_mode = True
-            self.ghost_mode_time = current_time + GHOST_MODE_DURATION
+            self.ghost_mode_until = max(self.ghost_mode_until, tick) + EFFECT_TICKS['ghost']
+            return self.ghost_mode_until
         elif power_up_type == 'shield':
             self.shield_mode = True
-            self.shield_mode_time = current_time + SHIELD_DURATION
+            self.shield_mode_until = max(self.shield_mode_until, tick) + EFFECT_TICKS['shield']
+            return self.shield_mode_until
         elif power_up_type == 'shrink':
             self.is_shrunk = True
-            self.shrink_time = current_time + SHRINK_DURATION
+            self.shrink_until = max(self.shrink_until, tick) + EFFECT_TICKS['shrink']
             # Remove half of the snake's body
             if len(self.body) > 1:
-                self.body = self.body[:len(self.body)//2]
+                for _ in range(len(self.body) - len(self.body)//2):
+                    self.board.remove_snake(self.board.cell(self.body.pop()))
+            return self.shrink_until
     
-    def update_power_ups(self, current_time):
-        if self.speed_boost and current_time >= self.speed_boost_time:
+    def expire_power_up(self, power_up_type, until):
+        """
+        End an effect, unless it was extended past the tick this timer was set for.
+        """
+        if power_up_type == 'speed' and self.speed_boost_until == until:
             self.speed_boost = False
-        if self.ghost_mode and current_time >= self.ghost_mode_time:
+        elif power_up_type == 'ghost' and self.ghost_mode_until == until:
             self.ghost_mode = False
-        if self.shield_mode and current_time >= self.shield_mode_time:
+        elif power_up_type == 'shield' and self.shield_mode_until == until:
             self.shield_mode = False
-        if self.is_shrunk and current_time >= self.shrink_time:
+        elif power_up_type == 'shrink' and self.shrink_until == until:
             self.is_shrunk = False
         
-    def draw(self, screen):
-        for i, segment in enumerate(self.body):
-            color = self.get_snake_color(i == 0)  # i == 0 means it's the head
+    def draw(self, screen, atlas=None, progress=1.0):
+        """
+        Draw the snake. progress (0 to 1) slides the head from its previous cell
+        into the current one, for rendering between simulation moves.
+        """
+        atlas = atlas or get_atlas()
+        head_tile = atlas.tile(self.get_snake_color(True), self.ghost_mode, self.shield_mode)
+        body_tile = atlas.tile(self.get_snake_color(False), self.ghost_mode)
+        segments = iter(self.body)
+        head = next(segments)
+        px, py = self.previous_head
+        if progress < 1.0 and abs(head[0] - px) + abs(head[1] - py) == GRID_SIZE:
+            head = (round(px + (head[0] - px) * progress), round(py + (head[1] - py) * progress))
+        screen.blit(head_tile, head)
+        screen.blits(zip(repeat(body_tile), segments), doreturn=False)
             
-            if self.ghost_mode:
-                s = pygame.Surface((GRID_SIZE - 1, GRID_SIZE - 1))
-                s.set_alpha(128)
-                s.fill(color)
-                screen.blit(s, (segment[0], segment[1]))
-            else:
-                pygame.draw.rect(screen, color, (segment[0], segment[1], GRID_SIZE - 1, GRID_SIZE - 1))
-                
-            # Draw shield effect
-            if self.shield_mode and i == 0:
-                pygame.draw.rect(screen, CYAN, (segment[0], segment[1], GRID_SIZE - 1, GRID_SIZE - 1), 2)
+    def draw_segment(self, screen, segment, is_head, atlas=None):
+        atlas = atlas or get_atlas()
+        tile = atlas.tile(self.get_snake_color(is_head), self.ghost_mode, self.shield_mode and is_head)
+        screen.blit(tile, segment)
     #color of snake changed
     def get_snake_color(self, is_head):
         if is_head:
@@ -110,4 +156,4 @@ class Snake:
                 return RED
         
         # Body color depends on player number
-        return GREEN if self.player_number == 1 else RED
\ No newline at end of file
+        return PLAYER_COLORS[(self.player_number - 1) % len(PLAYER_COLORS)]
\ No newline at end of file
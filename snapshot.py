@@ -0,0 +1,293 @@
+"""
+This module saves a game in progress to a compact binary snapshot and restores it later, for
+pausing a game to continue another time and for getting it back after a crash.
+
+A snapshot starts like a replay, with the mode, the number of players and the settings that shape
+the simulation. It goes on with the obstacles as delta-encoded cell indices, the random generator's
+state, and a GameState (see state.py) holding the snakes, scores, food, power-ups and timers.
+The GameState is mostly grids and arrays of 32-bit cell indices, so its bytes are split into four
+planes, byte 0 of every group of four, then byte 1 and so on, before compressing it with zlib: the
+high bytes of neighbouring indices are nearly all equal, and compress to almost nothing. Restoring builds a fresh engine with the same settings and loads all of that
+into it, so the game carries on exactly as it would have.
+
+    snapshot = Snapshot.capture(engine)   # cheap, on the game thread
+    snapshot.save(path)                   # encode, compress and write; fine on another thread
+    engine = Snapshot.load(path).restore()
+
+Autosave does the capturing every AUTOSAVE_INTERVAL ticks and leaves the writing to a background
+thread, so a frame never waits on the disk. Capturing copies the board's grids, which takes well
+under a millisecond up to AUTOSAVE_MAX_CELLS cells but tens of milliseconds on the largest boards,
+so games on bigger boards are only saved when paused or closed.
+"""
+
+import os
+import struct
+import threading
+import time
+import zlib
+from engine import Engine
+from replay import HEADER, simulation_settings, read_varint, write_varint
+from state import GameState
+from settings import *
+
+MAGIC = b"SNKS"
+VERSION = 1
+GAUSS = struct.Struct("<d")
+DISCARD = "discard"  # queued to the autosave writer to delete the save instead of writing one
+SHUFFLE_CHUNK = 1 << 16  # bytes of state split into planes at a time; a multiple of 4
+
+
+def shuffle(data):
+    """
+    Return the four byte planes of data. They are built a chunk at a time, because one slice of a
+    large board's state would hold the interpreter lock long enough to hold up the game's frames.
+    """
+    planes = [bytearray() for _ in range(4)]
+    for start in range(0, len(data), SHUFFLE_CHUNK):
+        end = start + SHUFFLE_CHUNK
+        for plane in range(4):
+            planes[plane] += data[start + plane:end:4]
+    return planes
+
+
+def unshuffle(data, length):
+    out = bytearray(length)
+    pos = 0
+    for plane in range(4):
+        size = len(range(plane, length, 4))
+        out[plane::4] = data[pos:pos + size]
+        pos += size
+    return out
+
+
+class Snapshot:
+    """
+    Everything needed to rebuild an engine at the tick it was captured on. Captured snapshots only
+    hold immutable data or data the engine never changes again, so they can be encoded on any thread.
+    """
+    __slots__ = ("game_mode", "players", "settings", "obstacles", "state")
+
+    @classmethod
+    def capture(cls, engine):
+        snapshot = cls.__new__(cls)
+        snapshot.game_mode = engine.game_mode
+        snapshot.players = engine.players
+        snapshot.settings = simulation_settings(engine)
+        snapshot.obstacles = engine.obstacles.positions  # never changes during a game, so not copied
+        snapshot.state = GameState.capture(engine)
+        return snapshot
+
+    def encode(self):
+        mode = self.game_mode.encode("ascii")
+        data = bytearray(MAGIC)
+        data.append(VERSION)
+        data.append(len(mode))
+        data += mode
+        write_varint(data, self.players)
+        data += HEADER.pack(*self.settings)
+
+        columns = self.settings[1]
+        write_varint(data, len(self.obstacles))
+        previous = 0
+        for cell in sorted((y // GRID_SIZE) * columns + x // GRID_SIZE for x, y in self.obstacles):
+            write_varint(data, cell - previous)
+            previous = cell
+
+        version, internal, gauss = self.state.rng_state
+        data.append(version)
+        data.append(gauss is not None)
+        if gauss is not None:
+            data += GAUSS.pack(gauss)
+        write_varint(data, len(internal))
+        data += struct.pack(f"<{len(internal)}I", *internal)
+
+        count, typecode = self.state.layout
+        compressor = zlib.compressobj(6)
+        compressed = b"".join([compressor.compress(plane) for plane in shuffle(self.state.buffer)] +
+                              [compressor.flush()])
+        write_varint(data, count)
+        data += typecode.encode("ascii")
+        write_varint(data, len(self.state.buffer))
+        write_varint(data, len(compressed))
+        data += compressed
+        return bytes(data)
+
+    @classmethod
+    def decode(cls, data):
+        if data[:4] != MAGIC:
+            raise ValueError("not a snapshot file")
+        if data[4] != VERSION:
+            raise ValueError(f"unsupported snapshot version {data[4]}")
+        snapshot = cls.__new__(cls)
+        mode_length = data[5]
+        snapshot.game_mode = data[6:6 + mode_length].decode("ascii")
+        pos = 6 + mode_length
+        snapshot.players, pos = read_varint(data, pos)
+        snapshot.settings = HEADER.unpack_from(data, pos)
+        pos += HEADER.size
+
+        seed, columns, rows = snapshot.settings[:3]
+        count, pos = read_varint(data, pos)
+        cell = 0
+        obstacles = []
+        for _ in range(count):
+            delta, pos = read_varint(data, pos)
+            cell += delta
+            obstacles.append(((cell % columns) * GRID_SIZE, (cell // columns) * GRID_SIZE))
+        snapshot.obstacles = obstacles
+
+        version, has_gauss = data[pos], data[pos + 1]
+        pos += 2
+        gauss = None
+        if has_gauss:
+            (gauss,) = GAUSS.unpack_from(data, pos)
+            pos += GAUSS.size
+        length, pos = read_varint(data, pos)
+        internal = struct.unpack_from(f"<{length}I", data, pos)
+        pos += 4 * length
+
+        count, pos = read_varint(data, pos)
+        typecode = chr(data[pos])
+        size, pos = read_varint(data, pos + 1)
+        length, pos = read_varint(data, pos)
+        state = GameState.__new__(GameState)
+        state.game = (seed, columns, rows, snapshot.players)
+        state.layout = (count, typecode)
+        try:
+            shuffled = zlib.decompress(data[pos:pos + length])
+        except zlib.error as e:
+            raise ValueError(f"corrupt snapshot: {e}")
+        if len(shuffled) != size:
+            raise ValueError("corrupt snapshot: wrong state size")
+        state.buffer = unshuffle(shuffled, size)
+        state.rng_state = (version, internal, gauss)
+        snapshot.state = state
+        return snapshot
+
+    def restore(self):
+        """
+        Build an engine in the state this snapshot was captured in.
+        """
+        seed, columns, rows = self.settings[:3]
+        engine = Engine(self.game_mode, seed=seed, columns=columns, rows=rows, players=self.players)
+        if simulation_settings(engine) != self.settings:
+            raise ValueError("snapshot was saved with different game settings")
+        obstacles = engine.obstacles
+        if sorted(obstacles.positions) != sorted(self.obstacles):
+            board = engine.board
+            for position in obstacles.positions:
+                board.remove_obstacle(board.cell(position))
+            for position in self.obstacles:
+                board.add_obstacle(board.cell(position))
+            obstacles.positions = list(self.obstacles)
+        self.state.load(engine)
+        return engine
+
+    def save(self, path):
+        """
+        Write the snapshot so that the file at path is always either the old one or the new one,
+        never half written. Returns the number of bytes written.
+        """
+        data = self.encode()
+        directory = os.path.dirname(path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+        temporary = path + ".tmp"
+        with open(temporary, "wb") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temporary, path)
+        return len(data)
+
+    @classmethod
+    def load(cls, path):
+        with open(path, "rb") as f:
+            return cls.decode(f.read())
+
+
+class Autosave:
+    """
+    Keeps the game in progress saved at path. update() captures a snapshot every `interval` ticks
+    on boards of up to max_cells cells and hands it to a background writer; save() works on any
+    board. Only the newest unwritten snapshot is kept, so a slow disk drops stale saves instead of
+    queueing them.
+    """
+    def __init__(self, path=AUTOSAVE_PATH, interval=AUTOSAVE_INTERVAL, max_cells=AUTOSAVE_MAX_CELLS):
+        self.path = path
+        self.interval = interval
+        self.max_cells = max_cells
+        self.last_tick = 0
+        self.pending = None  # snapshot waiting to be written, DISCARD, or None
+        self.busy = False
+        self.condition = threading.Condition()
+        self.thread = None   # started with the first save
+        # Timings of the latest save, in milliseconds, and its size in bytes
+        self.capture_ms = self.write_ms = 0.0
+        self.size = 0
+
+    def start(self, engine):
+        """
+        Count the next autosave from the engine's current tick.
+        """
+        self.last_tick = engine.tick
+
+    def update(self, engine):
+        if engine.tick - self.last_tick >= self.interval and not engine.game_over and \
+                engine.board.size <= self.max_cells:
+            self.save(engine)
+
+    def save(self, engine):
+        start = time.perf_counter()
+        snapshot = Snapshot.capture(engine)
+        self.capture_ms = (time.perf_counter() - start) * 1000
+        self.last_tick = engine.tick
+        self.submit(snapshot)
+
+    def discard(self):
+        """
+        Delete the save, once any save queued before has been written.
+        """
+        self.submit(DISCARD)
+
+    def submit(self, item):
+        with self.condition:
+            self.pending = item
+            self.condition.notify_all()
+        if self.thread is None:
+            self.thread = threading.Thread(target=self.run, daemon=True)
+            self.thread.start()
+
+    def flush(self, timeout=None):
+        """
+        Wait until everything submitted has reached the disk. Returns False on timeout.
+        """
+        with self.condition:
+            return self.condition.wait_for(lambda: self.pending is None and not self.busy, timeout)
+
+    def exists(self):
+        return os.path.exists(self.path)
+
+    def load(self):
+        return Snapshot.load(self.path)
+
+    def run(self):
+        while True:
+            with self.condition:
+                self.condition.wait_for(lambda: self.pending is not None)
+                item, self.pending = self.pending, None
+                self.busy = True
+            try:
+                start = time.perf_counter()
+                if item is DISCARD:
+                    if os.path.exists(self.path):
+                        os.remove(self.path)
+                else:
+                    self.size = item.save(self.path)
+                    self.write_ms = (time.perf_counter() - start) * 1000
+            except OSError as e:
+                print(f"Autosave failed: {e}")
+            finally:
+                with self.condition:
+                    self.busy = False
+                    self.condition.notify_all()
@@ -1,13 +1,20 @@
 """
 This module manages sound effects and background music for the enhanced snake game.
 It uses pygame for playing sounds and numpy for generating 8-bit style sound effects.
+Generated effects are cached as raw PCM files under sounds/cache, so numpy is only imported
+when an effect has to be synthesized for the first time.
 """
 
 import pygame
+import hashlib
+import mmap
 import os
-import numpy as np
+import wave
 from settings import *
 
+# numpy sample types for the mixer formats reported by pygame.mixer.get_init()
+SAMPLE_TYPES = {8: 'u1', -8: 'i1', 16: '<u2', -16: '<i2', 32: '<f4'}
+
 class SoundManager:
     """
     Manages sound initialization, loading, and playback for the game.
@@ -20,6 +27,7 @@ class SoundManager:
         """
         pygame.mixer.init(44100, -16, 2, 2048)
         self.sounds_dir = 'sounds'
+        self.cache_dir = os.path.join(self.sounds_dir, 'cache')
         self.ensure_sounds_directory()
         self.load_sounds()
         
@@ -54,15 +62,11 @@ class SoundManager:
         Generate a simple 8-bit style melody and save it as the background music WAV file.
         This uses square waves to simulate the 8-bit sound.
         """
+        import numpy as np
+        
         sample_rate = 44100
         duration = 0.1  # Duration of each note in seconds
         
-        def generate_note(freq, duration):
-            t = np.linspace(0, duration, int(sample_rate * duration))
-            # Basic square wave
-            wave = 0.3 * np.sign(np.sin(2 * np.pi * freq * t))
-            return wave
-        
         # Simple melody sequence (frequencies for a simple 8-bit tune)
         melody = [
             440.00,  # A4
@@ -75,25 +79,27 @@ class SoundManager:
             493.88   # B4
         ]
         
-        # Generate the complete melody
-        music = np.array([])
-        for freq in melody:
-            note = generate_note(freq, duration)
-            music = np.concatenate([music, note])
-        
-        # Convert to 16-bit integers
-        music = (music * 32767).astype(np.int16)
-        
-        # Save as stereo
-        stereo = np.ascontiguousarray(np.vstack((music, music)).T)
+        # Generate the complete melody into one preallocated stereo buffer
+        note_length = int(sample_rate * duration)
+        t = np.linspace(0, duration, note_length)
+        stereo = np.empty((len(melody) * note_length, 2), dtype=np.int16)
+        for i, freq in enumerate(melody):
+            # Basic square wave, converted to 16-bit integers
+            note = stereo[i * note_length:(i + 1) * note_length, 0]
+            note[:] = 0.3 * 32767 * np.sign(np.sin(2 * np.pi * freq * t))
+        stereo[:, 1] = stereo[:, 0]
         
         # Save as WAV file
-        from scipy.io import wavfile
-        wavfile.write(self.background_music, sample_rate, stereo)
+        with wave.open(self.background_music, 'wb') as wav:
+            wav.setnchannels(2)
+            wav.setsampwidth(2)
+            wav.setframerate(sample_rate)
+            wav.writeframes(stereo.tobytes())
     
     def create_sound_effect(self, duration, freq_start, freq_end=None):
         """
         Create a sound effect using a generated square wave.
+        The samples are read from the on-disk cache, and only synthesized on a cache miss.
 
         Args:
             duration (float): Duration of the sound effect in seconds.
@@ -103,16 +109,53 @@ class SoundManager:
         Returns:
             pygame.mixer.Sound: The generated sound effect.
         """
-        sample_rate = 44100
-        t = np.linspace(0, duration, int(sample_rate * duration))
         if freq_end is None:
             freq_end = freq_start
+        mixer_format = pygame.mixer.get_init()
+        key = hashlib.sha1(repr(("square", 0.4, duration, freq_start, freq_end, mixer_format)).encode())
+        path = os.path.join(self.cache_dir, f"{key.hexdigest()[:16]}.pcm")
+        if not os.path.exists(path):
+            self.write_sound_cache(path, self.synthesize_square_wave(duration, freq_start, freq_end, mixer_format))
+        
+        # Map the cached samples straight into a Sound, no decoding needed
+        with open(path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as samples:
+            return pygame.mixer.Sound(buffer=samples)
+    
+    def synthesize_square_wave(self, duration, freq_start, freq_end, mixer_format):
+        """
+        Synthesize a frequency sweep as raw PCM in the mixer's sample rate, format and channel count.
+
+        Returns:
+            bytes: Interleaved samples ready to be handed to pygame.mixer.Sound.
+        """
+        import numpy as np
+        
+        sample_rate, sample_format, channels = mixer_format
+        t = np.linspace(0, duration, int(sample_rate * duration))
         freq = np.linspace(freq_start, freq_end, len(t))
-        wave = 0.4 * np.sign(np.sin(2 * np.pi * freq * t))
-        sound_array = (wave * 32767).astype(np.int16)
-        # Ensure the array is C-contiguous
-        stereo = np.ascontiguousarray(np.vstack((sound_array, sound_array)).T)
-        return pygame.sndarray.make_sound(stereo)
+        wave_data = 0.4 * np.sign(np.sin(2 * np.pi * freq * t))
+        
+        sample_type = np.dtype(SAMPLE_TYPES[sample_format])
+        samples = np.empty((len(t), channels), dtype=sample_type)
+        if sample_type.kind == 'f':
+            samples[:, 0] = wave_data
+        else:
+            # Scale to the integer range, offsetting unsigned formats to their midpoint
+            info = np.iinfo(sample_type)
+            samples[:, 0] = wave_data * info.max if info.min < 0 else (wave_data + 1) * (info.max // 2)
+        samples[:, 1:] = samples[:, :1]
+        return samples.tobytes()
+    
+    def write_sound_cache(self, path, data):
+        """
+        Write cached samples atomically, so a crash never leaves a truncated file behind.
+        """
+        if not os.path.exists(self.cache_dir):
+            os.makedirs(self.cache_dir)
+        temp_path = f"{path}.{os.getpid()}.tmp"
+        with open(temp_path, 'wb') as f:
+            f.write(data)
+        os.replace(temp_path, path)
     
     def create_collect_sound(self):
         """
@@ -163,4 +206,18 @@ class SoundManager:
         """
         Play the game over sound effect.
         """
-        self.game_over_sound.play()
\ No newline at end of file
+        self.game_over_sound.play()
+
+
+class SilentSoundManager:
+    """
+    Stands in for SoundManager while audio is loading, or when it is disabled.
+    """
+    def play_collect_sound(self):
+        pass
+    
+    def play_power_up_sound(self):
+        pass
+    
+    def play_game_over_sound(self):
+        pass
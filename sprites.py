@@ -0,0 +1,59 @@
+import pygame
+from settings import *
+
+GHOST_ALPHA = 128
+SHIELD_WIDTH = 2
+
+
+class SpriteAtlas:
+    """
+    Pre-rendered snake segment tiles, so drawing a snake is a batch of blits with no
+    per-segment Surface allocation. Tiles are keyed by (color, ghost, shield) and built on
+    first use; call rebuild() after changing the palette.
+    """
+    def __init__(self, palette=(GREEN, RED, PURPLE, YELLOW)):
+        self.palette = palette
+        self.rebuild()
+
+    def rebuild(self, palette=None):
+        if palette is not None:
+            self.palette = palette
+        self.tiles = {}
+        for color in self.palette:
+            for ghost in (False, True):
+                for shield in (False, True):
+                    self.tile(color, ghost, shield)
+
+    def tile(self, color, ghost=False, shield=False):
+        key = (color, ghost, shield)
+        tile = self.tiles.get(key)
+        if tile is None:
+            tile = self.tiles[key] = self.make_tile(color, ghost, shield)
+        return tile
+
+    def make_tile(self, color, ghost, shield):
+        size = (GRID_SIZE - 1, GRID_SIZE - 1)
+        if ghost and shield:
+            # Translucent body with an opaque shield outline needs per-pixel alpha
+            tile = pygame.Surface(size, pygame.SRCALPHA)
+            tile.fill((*color, GHOST_ALPHA))
+        else:
+            tile = pygame.Surface(size)
+            tile.fill(color)
+            if ghost:
+                tile.set_alpha(GHOST_ALPHA)
+        if shield:
+            pygame.draw.rect(tile, CYAN, tile.get_rect(), SHIELD_WIDTH)
+        return tile
+
+
+_atlas = None
+
+def get_atlas():
+    """
+    Return the shared atlas, building it on first use.
+    """
+    global _atlas
+    if _atlas is None:
+        _atlas = SpriteAtlas()
+    return _atlas
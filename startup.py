@@ -0,0 +1,66 @@
+"""
+This module measures how long the game takes to start: time spent importing each module and
+the time at which each startup milestone (display ready, first frame, audio ready) is reached.
+It is imported first by game.py, and only hooks imports when --startup-report is passed.
+"""
+
+import builtins
+import sys
+import time
+
+
+class StartupTimer:
+    """
+    Records import times and startup milestones relative to the moment this module was imported.
+    """
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.imports = {}    # module name -> seconds spent importing it, including its own imports
+        self.marks = []      # (milestone, seconds since start)
+        self.enabled = False
+        self.original_import = builtins.__import__
+
+    def install(self):
+        """
+        Start timing imports by wrapping the builtin import function.
+        """
+        self.enabled = True
+        original_import = self.original_import
+        imports = self.imports
+        modules = sys.modules
+
+        def timed_import(name, globals=None, locals=None, fromlist=(), level=0):
+            if level or name in modules:
+                return original_import(name, globals, locals, fromlist, level)
+            start = time.perf_counter()
+            try:
+                return original_import(name, globals, locals, fromlist, level)
+            finally:
+                imports.setdefault(name, time.perf_counter() - start)
+
+        builtins.__import__ = timed_import
+
+    def uninstall(self):
+        builtins.__import__ = self.original_import
+
+    def mark(self, milestone):
+        if self.enabled:
+            self.marks.append((milestone, time.perf_counter() - self.start))
+
+    def report(self, limit=15):
+        """
+        Return a printable summary of the slowest imports and the milestones reached so far.
+        """
+        lines = ["Startup report", "  slowest imports (including nested imports):"]
+        slowest = sorted(self.imports.items(), key=lambda item: item[1], reverse=True)[:limit]
+        for name, seconds in slowest:
+            lines.append(f"    {seconds * 1000:8.1f} ms  {name}")
+        lines.append("  milestones:")
+        for milestone, seconds in self.marks:
+            lines.append(f"    {seconds * 1000:8.1f} ms  {milestone}")
+        return "\n".join(lines)
+
+
+timer = StartupTimer()
+if "--startup-report" in sys.argv:
+    timer.install()
@@ -0,0 +1,192 @@
+"""
+This module packs the dynamic state of a game into one flat buffer, for agents that search ahead
+and for anything else that needs to go back to an earlier point of a game.
+
+    root = GameState.capture(engine)   # snapshot a running engine
+    node = root.clone()                # a copy of one buffer
+    node.load(engine)                  # put the engine back in that state and simulate from there
+    node.restore(root)                 # overwrite a state in place with another one
+
+The buffer holds the counters and scores as a handful of integers, one record per snake, the
+power-ups on the board and the scheduler's timers as small fixed records, every body as packed cell
+indices, and raw copies of the board's occupancy grids and free-cell index. Obstacles never change during a game, so they are not copied: a state can only be
+loaded into an engine playing the same game (same seed, board and players).
+
+The random generator's state is kept too, so a loaded state replays exactly like the original. It
+is held as a shared tuple rather than copied, and search agents that don't need identical food
+spawns can leave it out with capture(engine, rng=False).
+"""
+
+from array import array
+from collections import deque
+from engine import DEATH_CAUSES
+from power_up import POWER_UP_TYPES
+from settings import *
+
+DIRECTIONS = ("UP", "DOWN", "LEFT", "RIGHT")
+DIRECTION_CODES = {direction: code for code, direction in enumerate(DIRECTIONS)}
+TIMER_KINDS = ("expire", "despawn", "spawn")
+# tick, time, flags, cause, winner, food, power-ups, next serial, timers, timer seq, free cells, body cells
+HEADER = 12
+SNAKE_FIELDS = 12  # see snake_record()
+POWER_UP_FIELDS = 3  # cell, type, serial
+TIMER_FIELDS = 6     # tick, seq, kind and a payload of up to three integers
+# Bits of a snake record's flags field
+ALIVE, GROWING, SPEED, GHOST, SHIELD, SHRUNK = 1, 2, 4, 8, 16, 32
+
+
+def snake_record(snake):
+    flags = (ALIVE * snake.alive | GROWING * snake.grow_pending | SPEED * snake.speed_boost |
+             GHOST * snake.ghost_mode | SHIELD * snake.shield_mode | SHRUNK * snake.is_shrunk)
+    head, previous = snake.body[0], snake.previous_head
+    return (flags, DIRECTION_CODES[snake.direction], snake.move_countdown, len(snake.body),
+            snake.speed_boost_until, snake.ghost_mode_until, snake.shield_mode_until, snake.shrink_until,
+            head[0], head[1], previous[0], previous[1])
+
+
+class GameState:
+    """
+    A snapshot of everything in a game that changes from tick to tick. Build one with capture().
+    """
+    __slots__ = ("game", "layout", "buffer", "rng_state")
+
+    @classmethod
+    def capture(cls, engine, rng=True):
+        board = engine.board
+        players = len(engine.snakes)
+        cell = board.cell
+        food = engine.food.position
+        power_ups = engine.power_ups
+        scheduler = engine.scheduler
+        cause = DEATH_CAUSES.index(engine.death_cause) + 1 if engine.death_cause else 0
+        winner = -1 if engine.winner is None else engine.winner
+
+        numbers = array('q', (
+            engine.tick, engine.time, engine.game_over | engine.board_full << 1, cause, winner,
+            cell(food) if food is not None else -1,
+            len(power_ups.items), power_ups.next_serial, len(scheduler.heap), scheduler.seq,
+            len(board.free_cells), sum(len(snake.body) - 1 for snake in engine.snakes)))
+        numbers.extend(engine.score)
+        for power_up_cell, (power_up_type, serial) in power_ups.items.items():
+            numbers.extend((power_up_cell, POWER_UP_TYPES.index(power_up_type), serial))
+        for tick, seq, kind, payload in scheduler.heap:
+            numbers.extend((tick, seq, TIMER_KINDS.index(kind)))
+            numbers.extend(payload + (0,) * (3 - len(payload)))
+        bodies = array('H' if board.size <= 0x10000 else 'I')
+        for snake in engine.snakes:
+            numbers.extend(snake_record(snake))
+            body = iter(snake.body)
+            next(body)
+            bodies.extend(map(cell, body))
+
+        state = cls.__new__(cls)
+        state.game = (engine.seed, board.columns, board.rows, players)
+        state.layout = (len(numbers), bodies.typecode)
+        state.buffer = bytearray().join((numbers, bodies, board.snake_cells, board.owner, board.item_cells,
+                                         board.free_slot, board.free_cells))
+        state.rng_state = engine.rng.getstate() if rng else None
+        return state
+
+    def clone(self):
+        state = GameState.__new__(GameState)
+        state.game = self.game
+        state.layout = self.layout
+        state.buffer = bytearray(self.buffer)
+        state.rng_state = self.rng_state
+        return state
+
+    def restore(self, other):
+        """
+        Make this state a copy of another one of the same game, reusing this state's buffer.
+        """
+        if other.game != self.game:
+            raise ValueError("states are from different games")
+        self.layout = other.layout
+        self.buffer[:] = other.buffer
+        self.rng_state = other.rng_state
+
+    @property
+    def nbytes(self):
+        return len(self.buffer)
+
+    def load(self, engine):
+        """
+        Put an engine playing the same game back into this state.
+        """
+        board = engine.board
+        if (engine.seed, board.columns, board.rows, len(engine.snakes)) != self.game:
+            raise ValueError("state is from a different game")
+        count, typecode = self.layout
+        view = memoryview(self.buffer)
+        numbers = array('q')
+        numbers.frombytes(view[:8 * count])
+        pos = 8 * count
+        free_count, body_count = numbers[10], numbers[11]
+        bodies = array(typecode)
+        end = pos + bodies.itemsize * body_count
+        bodies.frombytes(view[pos:end])
+        pos = end
+
+        # The grids are copied straight back; the free-cell list changes length with the game
+        size = board.size
+        board.snake_cells[:] = view[pos:pos + size]
+        board.owner[:] = view[pos + size:pos + 2 * size]
+        board.item_cells[:] = view[pos + 2 * size:pos + 3 * size]
+        pos += 3 * size
+        memoryview(board.free_slot).cast('B')[:] = view[pos:pos + 4 * size]
+        pos += 4 * size
+        del board.free_cells[:]
+        board.free_cells.frombytes(view[pos:pos + 4 * free_count])
+        if board.dirty is not None:
+            board.dirty.update(range(size))
+
+        (engine.tick, engine.time, flags, cause, winner, food, power_up_count, next_serial, timer_count,
+         timer_seq, _, _) = numbers[:HEADER]
+        engine.game_over = bool(flags & 1)
+        engine.board_full = bool(flags & 2)
+        engine.death_cause = DEATH_CAUSES[cause - 1] if cause else None
+        engine.winner = None if winner < 0 else winner
+        engine.food.position = board.position(food) if food >= 0 else None
+        players = len(engine.snakes)
+        engine.score[:] = numbers[HEADER:HEADER + players]
+        pos = HEADER + players
+
+        # The item grid is already restored, so power-ups go straight into the dict
+        power_ups = engine.power_ups
+        power_ups.items.clear()
+        for _ in range(power_up_count):
+            power_up_cell, power_up_type, serial = numbers[pos:pos + POWER_UP_FIELDS]
+            power_ups.items[power_up_cell] = (POWER_UP_TYPES[power_up_type], serial)
+            pos += POWER_UP_FIELDS
+        power_ups.next_serial = next_serial
+        # Timers are stored in heap order, so the list is a valid heap as it is
+        heap = engine.scheduler.heap
+        heap.clear()
+        for _ in range(timer_count):
+            tick, seq, kind, a, b, c = numbers[pos:pos + TIMER_FIELDS]
+            kind = TIMER_KINDS[kind]
+            heap.append((tick, seq, kind, (a, b, c) if kind == "expire" else (a, b) if kind == "despawn" else ()))
+            pos += TIMER_FIELDS
+        engine.scheduler.seq = timer_seq
+
+        position = board.position
+        start = 0
+        for snake in engine.snakes:
+            (flags, direction, snake.move_countdown, length, snake.speed_boost_until, snake.ghost_mode_until,
+             snake.shield_mode_until, snake.shrink_until, x, y, px, py) = numbers[pos:pos + SNAKE_FIELDS]
+            pos += SNAKE_FIELDS
+            snake.alive = bool(flags & ALIVE)
+            snake.grow_pending = bool(flags & GROWING)
+            snake.speed_boost = bool(flags & SPEED)
+            snake.ghost_mode = bool(flags & GHOST)
+            snake.shield_mode = bool(flags & SHIELD)
+            snake.is_shrunk = bool(flags & SHRUNK)
+            snake.direction = DIRECTIONS[direction]
+            snake.previous_head = (px, py)
+            body = deque(map(position, bodies[start:start + length - 1]))
+            start += length - 1
+            body.appendleft((x, y))
+            snake.body = body
+            snake.head_cell = board.cell((x, y))
+        if self.rng_state is not None:
+            engine.rng.setstate(self.rng_state)
@@ -0,0 +1,50 @@
+from collections import OrderedDict
+from settings import *
+
+
+class TextCache:
+    """
+    Cache of rendered text surfaces, so each string is rasterized once instead of every frame.
+
+    render() is a bounded LRU cache for static labels. field() keeps one surface per named HUD
+    field and only re-renders it when the field's text changes, so values like the score don't
+    push labels out of the LRU.
+    """
+    def __init__(self, font, max_size=TEXT_CACHE_SIZE):
+        self.font = font
+        self.max_size = max_size
+        self.surfaces = OrderedDict()
+        self.fields = {}
+
+    def render(self, text, color, font=None):
+        font = font or self.font
+        key = (font, text, color)
+        surface = self.surfaces.get(key)
+        if surface is None:
+            surface = font.render(text, True, color)
+            self.surfaces[key] = surface
+            if len(self.surfaces) > self.max_size:
+                self.surfaces.popitem(last=False)
+        else:
+            self.surfaces.move_to_end(key)
+        return surface
+
+    def field(self, name, text, color, font=None):
+        font = font or self.font
+        key = (font, text, color)
+        cached = self.fields.get(name)
+        if cached is not None and cached[0] == key:
+            return cached[1]
+        surface = font.render(text, True, color)
+        self.fields[name] = (key, surface)
+        return surface
+
+    def invalidate(self, name=None):
+        """
+        Drop one named field, or every cached surface if no name is given.
+        """
+        if name is None:
+            self.surfaces.clear()
+            self.fields.clear()
+        else:
+            self.fields.pop(name, None)
@@ -0,0 +1,241 @@
+"""
+This module plays seeded headless matches between controllers across a process pool and
+aggregates the results as they come in:
+
+    python tournament.py --matches 5000                          # autopilot vs autopilot, all cores
+    python tournament.py --matches 2000 -p1 autopilot:500 -p2 random --board 60x40
+    python tournament.py --mode 1P --matches 500 --json results.json
+    python tournament.py --mode ARENA --players 16 --board 80x60 --matches 200
+
+Every worker process keeps one engine and its controllers, and resets them between matches,
+so nothing is imported or initialized again per match. Match i is played with seed --seed + i,
+so a tournament is reproducible whatever the number of workers.
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import random
+import sys
+import time
+from collections import Counter
+from autopilot import Autopilot
+from engine import Engine, DEATH_CAUSES, OPPOSITE_DIRECTIONS
+from settings import *
+
+
+class RandomController:
+    """
+    Goes straight, turning at random now and then; a baseline to measure other controllers against.
+    """
+    def __init__(self, engine, player_num, turn_chance=0.1):
+        self.engine = engine
+        self.player_num = player_num
+        self.turn_chance = turn_chance
+        self.rng = random.Random()
+
+    def reset(self, seed):
+        self.rng.seed(seed * 2 + self.player_num)
+
+    def action(self):
+        snake = self.engine.snakes[self.player_num - 1]
+        if not self.engine.moves_next_tick(snake) or self.rng.random() >= self.turn_chance:
+            return None
+        turns = [d for d in OPPOSITE_DIRECTIONS if d not in (snake.direction, OPPOSITE_DIRECTIONS[snake.direction])]
+        return (self.player_num, self.rng.choice(turns))
+
+
+CONTROLLERS = {
+    "autopilot": lambda engine, player_num, argument: Autopilot(
+        engine, player_num, int(argument) if argument else AUTOPILOT_BUDGET),
+    "random": lambda engine, player_num, argument: RandomController(
+        engine, player_num, float(argument) if argument else 0.1),
+}
+
+
+def make_controller(spec, engine, player_num):
+    """
+    Build a controller from a spec like "autopilot", "autopilot:500" (search budget) or "random:0.2"
+    (turn chance).
+    """
+    name, _, argument = spec.partition(":")
+    if name not in CONTROLLERS:
+        raise ValueError(f"unknown controller {spec!r}")
+    return CONTROLLERS[name](engine, player_num, argument)
+
+
+# Per-process state, set up once by init_worker
+_engine = None
+_controllers = []
+_max_ticks = 0
+
+
+def init_worker(mode, players, columns, rows, controllers, max_ticks):
+    global _engine, _controllers, _max_ticks
+    _engine = Engine(mode, seed=0, columns=columns, rows=rows, players=players)
+    # Player 1 uses the first controller and everyone else the second
+    _controllers = [make_controller(controllers[min(player_num, 2) - 1], _engine, player_num)
+                    for player_num in range(1, len(_engine.snakes) + 1)]
+    _max_ticks = max_ticks
+
+
+def play_match(seed):
+    """
+    Play one match in this worker and return its result as a small dict.
+    """
+    engine = _engine
+    engine.reset(seed)
+    for controller in _controllers:
+        if hasattr(controller, "reset"):
+            controller.reset(seed)
+
+    loser = None
+    while not engine.game_over and engine.tick < _max_ticks:
+        actions = [action for action in (c.action() for c in _controllers) if action is not None]
+        for event in engine.step(actions):
+            if event[0] == "game_over":
+                loser = event[1]
+
+    cause = engine.death_cause or "timeout"
+    if len(engine.snakes) == 1 or cause in ("board_full", "timeout") or not engine.winner:
+        # Nobody outlived everyone else: the highest score takes it
+        scores = engine.score
+        best = max(scores)
+        winner = scores.index(best) + 1 if scores.count(best) == 1 else 0
+        if cause == "board_full" or len(engine.snakes) == 1:
+            loser = None
+    else:
+        winner = engine.winner
+    return {
+        "seed": seed,
+        "winner": winner,          # player number, or 0 for a draw
+        "loser": loser,            # player whose death ended the match, if any
+        "cause": cause,
+        "score": list(engine.score),
+        "length": [len(snake.body) for snake in engine.snakes],
+        "ticks": engine.tick,
+    }
+
+
+class Results:
+    """
+    Running totals over the matches received so far.
+    """
+    def __init__(self, players):
+        self.players = players
+        self.matches = 0
+        self.wins = Counter()
+        self.causes = Counter()
+        self.scores = [Counter() for _ in range(players)]
+        self.ticks = Counter()
+
+    def add(self, result):
+        self.matches += 1
+        self.wins[result["winner"]] += 1
+        self.causes[result["cause"]] += 1
+        for player, score in enumerate(result["score"]):
+            self.scores[player][score] += 1
+        self.ticks[result["ticks"]] += 1
+
+    @staticmethod
+    def percentile(counts, p):
+        total = sum(counts.values())
+        target = total * p / 100
+        seen = 0
+        for value in sorted(counts):
+            seen += counts[value]
+            if seen >= target:
+                return value
+        return 0
+
+    @staticmethod
+    def mean(counts):
+        total = sum(counts.values())
+        return sum(value * n for value, n in counts.items()) / total if total else 0.0
+
+    def summary(self):
+        return {
+            "matches": self.matches,
+            "win_rate": {("draw" if p == 0 else f"P{p}"): self.wins[p] / self.matches
+                         for p in sorted(self.wins)} if self.players > 1 else {},
+            "causes": {cause: self.causes[cause] for cause in DEATH_CAUSES + ("timeout",) if self.causes[cause]},
+            "score": [{"mean": self.mean(c), "p50": self.percentile(c, 50), "p90": self.percentile(c, 90),
+                       "max": max(c)} for c in self.scores],
+            "ticks": {"mean": self.mean(self.ticks), "p50": self.percentile(self.ticks, 50),
+                      "max": max(self.ticks)},
+        }
+
+    def progress_line(self):
+        line = f"{self.matches:7d} matches"
+        if self.players > 1:
+            line += "  " + "  ".join(f"P{p} {self.wins[p] / self.matches:6.1%}" for p in range(1, self.players + 1))
+            line += f"  draw {self.wins[0] / self.matches:6.1%}"
+        line += "  score " + " / ".join(f"{self.mean(c):.1f}" for c in self.scores)
+        return line + f"  ticks {self.mean(self.ticks):.0f}"
+
+
+def parse_board(text):
+    columns, rows = (int(n) for n in text.lower().split("x"))
+    return columns, rows
+
+
+def positive(text):
+    try:
+        value = int(text)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected a number, got {text!r}")
+    if value < 1:
+        raise argparse.ArgumentTypeError("must be at least 1")
+    return value
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Play headless matches between controllers")
+    parser.add_argument("--matches", type=positive, default=1000)
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="processes (default: all cores)")
+    parser.add_argument("--mode", choices=("1P", "2P", "ARENA"), default="2P")
+    parser.add_argument("--players", type=int, default=ARENA_PLAYERS, help="snakes in an arena match")
+    parser.add_argument("--board", type=parse_board, default=(WINDOW_WIDTH // GRID_SIZE, WINDOW_HEIGHT // GRID_SIZE),
+                        metavar="COLUMNSxROWS")
+    parser.add_argument("-p1", default="autopilot", help="player 1 controller: autopilot[:budget] or random[:chance]")
+    parser.add_argument("-p2", default="autopilot", help="player 2 controller, and every other arena player's")
+    parser.add_argument("--seed", type=int, default=0, help="seed of the first match")
+    parser.add_argument("--max-ticks", type=int, default=SIM_TICK_RATE * 300, help="end a match as a timeout after this")
+    parser.add_argument("--report-every", type=int, default=100, help="print running totals every N matches")
+    parser.add_argument("--json", help="write the summary and every match result to this file")
+    args = parser.parse_args()
+
+    controllers = [args.p1, args.p2]
+    for spec in controllers:
+        if spec.partition(":")[0] not in CONTROLLERS:
+            parser.error(f"unknown controller {spec!r}")
+
+    players = {"1P": 1, "2P": 2}.get(args.mode, args.players)
+    results = Results(players)
+    matches = []
+    seeds = range(args.seed, args.seed + args.matches)
+    # Small chunks keep results streaming in and the workers evenly loaded
+    chunksize = max(1, min(16, args.matches // (args.workers * 8)))
+    start = time.perf_counter()
+    with multiprocessing.Pool(args.workers, init_worker,
+                              (args.mode, players, *args.board, controllers, args.max_ticks)) as pool:
+        for result in pool.imap_unordered(play_match, seeds, chunksize):
+            results.add(result)
+            if args.json:
+                matches.append(result)
+            if results.matches % args.report_every == 0:
+                print(results.progress_line(), flush=True)
+    elapsed = time.perf_counter() - start
+
+    summary = results.summary()
+    summary["matches_per_second"] = results.matches / elapsed
+    summary["workers"] = args.workers
+    print(json.dumps(summary, indent=2))
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"summary": summary, "matches": sorted(matches, key=lambda m: m["seed"])}, f)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
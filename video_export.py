@@ -0,0 +1,231 @@
+"""
+This module turns games into video frames for bug triage: replays, seeded autopilot games and
+live sessions of the game.
+
+Frames are drawn by the game's own renderer under the SDL dummy driver. Capturing one is a single
+blit of the screen (or a scale, when downscaling) into one of a few preallocated frame surfaces.
+A worker thread writes each frame's pixels straight from the surface's buffer view, either
+appended to one raw stream or saved as a numbered image, and hands the surface back for reuse.
+When every frame surface is still waiting to be written, an export waits for one, but a live game
+drops the frame instead, so the game loop never waits on the disk.
+
+    python video_export.py replays/<file>.replay clip.raw                  # every frame, raw
+    python video_export.py replays/<file>.replay frames/ --every 2 --scale 0.5
+    python video_export.py replays/<file>.replay frames/ --format bmp      # faster than PNG
+    python video_export.py --play ARENA --seed 7 arena.raw                 # an autopilot game
+    python game.py --record-video session.raw                              # record while playing
+
+A raw stream is headerless 32-bit pixels; the export prints the ffmpeg command that encodes it.
+Raw frames cost a copy and a write, so a raw export runs as fast as the disk takes the pixels;
+PNG compression holds the interpreter lock, and is the slowest option.
+"""
+
+import argparse
+import os
+import queue
+import sys
+import threading
+import time
+import pygame
+from settings import *
+
+MASKS = (0xFF0000, 0x00FF00, 0x0000FF, 0)  # 32-bit XRGB frame surfaces
+# How ffmpeg names those pixels as they sit in memory
+PIXEL_FORMAT = "bgr0" if sys.byteorder == "little" else "0rgb"
+
+
+class FrameWriter:
+    """
+    Writes captured frames on a worker thread, to a raw stream if path ends in .raw and as images
+    of image_format (png, bmp or tga) in the directory path otherwise. Keeps one frame out of every `every` and scales them
+    by `scale`. With block=False a frame is dropped rather than waited for when the worker is behind.
+    """
+    def __init__(self, path, size, every=1, scale=1.0, block=True, image_format="png", buffers=VIDEO_BUFFER_FRAMES):
+        self.path = path
+        self.raw = path.endswith(".raw")
+        self.image_format = image_format
+        self.every = max(1, every)
+        self.size = (max(1, round(size[0] * scale)), max(1, round(size[1] * scale)))
+        self.block = block
+        self.seen = 0      # frames offered, kept or not
+        self.queued = 0
+        self.written = 0
+        self.dropped = 0   # frames lost because the worker was behind
+        self.error = None  # first error the worker ran into
+        if self.raw:
+            directory = os.path.dirname(path)
+            if directory and not os.path.exists(directory):
+                os.makedirs(directory)
+            self.file = open(path, "wb")
+        elif not os.path.exists(path):
+            os.makedirs(path)
+        self.free = queue.Queue()
+        for _ in range(buffers):
+            self.free.put(pygame.Surface(self.size, 0, 32, MASKS))
+        self.frames = queue.Queue()
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    def due(self):
+        """
+        Whether the next frame offered will be kept, so callers can skip drawing the others.
+        """
+        return self.seen % self.every == 0
+
+    def skip(self):
+        self.seen += 1
+
+    def capture(self, surface):
+        """
+        Queue a copy of surface as the next frame. Returns False if it was skipped or dropped.
+        """
+        due = self.due()
+        self.seen += 1
+        if not due:
+            return False
+        try:
+            frame = self.free.get(self.block)
+        except queue.Empty:
+            self.dropped += 1
+            return False
+        if surface.get_size() == self.size:
+            frame.blit(surface, (0, 0))
+        elif surface.get_bitsize() == 32 and surface.get_masks() == MASKS:
+            pygame.transform.scale(surface, self.size, frame)
+        else:
+            frame.blit(pygame.transform.scale(surface, self.size), (0, 0))
+        self.frames.put((self.queued, frame))
+        self.queued += 1
+        return True
+
+    def run(self):
+        while True:
+            item = self.frames.get()
+            if item is None:
+                break
+            index, frame = item
+            try:
+                if self.raw:
+                    self.file.write(frame.get_view("0"))
+                else:
+                    pygame.image.save(frame, os.path.join(self.path, f"frame-{index:06d}.{self.image_format}"))
+                self.written += 1
+            except (OSError, pygame.error) as e:
+                self.error = self.error or e
+            self.free.put(frame)
+
+    def close(self):
+        """
+        Wait for the queued frames to be written and close the output. Returns the number written.
+        """
+        self.frames.put(None)
+        self.thread.join()
+        if self.raw:
+            self.file.close()
+        if self.error is not None:
+            print(f"Video export failed: {self.error}")
+        return self.written
+
+    def ffmpeg_command(self, fps):
+        width, height = self.size
+        if self.raw:
+            source = f"-f rawvideo -pix_fmt {PIXEL_FORMAT} -s {width}x{height} -r {fps:g} -i {self.path}"
+        else:
+            source = f"-framerate {fps:g} -i {os.path.join(self.path, 'frame-%06d.' + self.image_format)}"
+        return f"ffmpeg {source} -pix_fmt yuv420p {os.path.splitext(self.path.rstrip(os.sep))[0]}.mp4"
+
+
+def draw_frame(game):
+    """
+    Draw the game the way the PLAYING screen does, one frame per simulation tick.
+    """
+    if game.camera is not None:
+        game.camera.draw(0.0)
+    else:
+        game.draw_game(0.0)
+    game.draw_score()
+
+
+def export(engine, step, path, every=1, scale=1.0, max_ticks=None, image_format="png"):
+    """
+    Draw a frame of engine after every call of step() until the game ends (or max_ticks have been
+    simulated) and write them to path. Returns the writer and the seconds the export took.
+    """
+    from game import Game
+    game = Game(audio=False, headless=True, board_size=(engine.columns, engine.rows))
+    game.game_mode = engine.game_mode
+    game.engine = engine
+    writer = FrameWriter(path, game.screen.get_size(), every, scale, image_format=image_format)
+    start = time.perf_counter()
+    draw_frame(game)
+    writer.capture(game.screen)  # where the game starts
+    first_tick = engine.tick
+    while not engine.game_over and (max_ticks is None or engine.tick - first_tick < max_ticks):
+        if not step():
+            break
+        if writer.due():
+            draw_frame(game)
+            writer.capture(game.screen)
+        else:
+            writer.skip()
+    writer.close()
+    return writer, time.perf_counter() - start
+
+
+def export_replay(replay_path, path, every=1, scale=1.0, start=0, max_ticks=None, image_format="png"):
+    from replay import ReplayPlayer
+    player = ReplayPlayer.load(replay_path)
+    player.seek(start)
+
+    def step():
+        if player.finished:
+            return False
+        player.step()
+        return True
+    return export(player.engine, step, path, every, scale, max_ticks, image_format)
+
+
+def export_autopilot_game(mode, seed, path, every=1, scale=1.0, max_ticks=None, image_format="png"):
+    """
+    Play a seeded game with every snake on autopilot and export it.
+    """
+    from autopilot import Autopilot
+    from engine import Engine
+    engine = Engine(mode, seed=seed)
+    pilots = [Autopilot(engine, player_num) for player_num in range(1, len(engine.snakes) + 1)]
+
+    def step():
+        engine.step([action for action in (pilot.action() for pilot in pilots) if action is not None])
+        return True
+    return export(engine, step, path, every, scale, max_ticks, image_format)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export a replay or an autopilot game as video frames")
+    parser.add_argument("replay", nargs="?", help="replay file to export (or use --play)")
+    parser.add_argument("output", help="a .raw file for a raw frame stream, or a directory for image frames")
+    parser.add_argument("--format", choices=("png", "bmp", "tga"), default="png", help="image format of frames")
+    parser.add_argument("--play", choices=("1P", "2P", "ARENA"), help="export a game played by autopilots instead")
+    parser.add_argument("--seed", type=int, default=0, help="seed of the autopilot game")
+    parser.add_argument("--every", type=int, default=1, metavar="N", help="keep one frame in N")
+    parser.add_argument("--scale", type=float, default=1.0, help="scale frames by this factor, e.g. 0.5")
+    parser.add_argument("--start", type=int, default=0, metavar="TICK", help="replay tick to start at")
+    parser.add_argument("--ticks", type=int, metavar="N",
+                        help="stop after N simulation ticks (default: the whole replay, or a minute of --play)")
+    args = parser.parse_args()
+    if (args.replay is None) == (args.play is None):
+        parser.error("give either a replay file or --play MODE")
+
+    if args.play:
+        # Autopilots can keep a game going for a long time
+        ticks = args.ticks if args.ticks is not None else 60 * SIM_TICK_RATE
+        writer, elapsed = export_autopilot_game(args.play, args.seed, args.output, args.every, args.scale, ticks,
+                                                args.format)
+    else:
+        writer, elapsed = export_replay(args.replay, args.output, args.every, args.scale, args.start, args.ticks,
+                                        args.format)
+    ticks = writer.seen - 1
+    fps = SIM_TICK_RATE / writer.every
+    print(f"{writer.written} frames of {writer.size[0]}x{writer.size[1]} written in {elapsed:.2f}s, "
+          f"{ticks / SIM_TICK_RATE / elapsed:.1f}x real time")
+    print(f"Encode with: {writer.ffmpeg_command(fps)}")